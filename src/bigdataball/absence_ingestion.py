@@ -8,12 +8,19 @@
 # tests) inject their own `engine` so it can be reused across contexts.
 import pandas as pd
 from sqlalchemy import text
+from . import db_utils
 from . import mappings
+from . import player_feed
 
 ABSENCES_TABLE_NAME = "player_absences"
 PLAYERS_TABLE_NAME = "dim_players"
+# Scratch table this file's absence players are staged in for db_utils.learn_players;
+# created and dropped inside the same transaction.
+PLAYERS_STAGE_TABLE_NAME = "_stage_absence_players"
 ABSENCE_SHEET_NAME = "DNP-DND-NWT"
 DNP_CD_REASON = "COACH'S DECISION"
+# Rows per multi-row INSERT; keeps (rows x columns) under SQLite's bound-parameter limit.
+INSERT_CHUNKSIZE = 500
 
 # The sanitizer (see _sanitize_columns) turns the raw feed headers
 # (GAME DATE, GAME-ID, TEAM, OPPONENT, PLAYER-ID, PLAYER NAME, STATUS,
@@ -40,14 +47,22 @@ EXPECTED_COLUMNS = [
 
 
 def _sanitize_columns(columns):
-    """Same header sanitization as daily_player_upload.py: newlines/hyphens/
-    spaces -> underscore, strip anything non-alphanumeric/underscore, upper."""
+    """Same header sanitization as the box-score sheet (player_feed.sanitize_column):
+    newlines/hyphens/spaces -> underscore, strip anything non-alphanumeric/underscore, upper."""
+    return [player_feed.sanitize_column(column) for column in columns]
+
+
+def _player_date_keys(player_ids, dates):
+    """Returns composite int64 (PLAYER_ID, DATE) keys, PLAYER_ID * 10**8 + YYYYMMDD.
+    `dates` may be datetimes or date strings in any format pd.to_datetime accepts,
+    so a stored "2025-11-01 00:00:00" keys the same as "2025-11-01". Integer keys
+    hash and compare far faster than per-row 'PLAYER_ID_DATE' strings."""
+    dates = pd.to_datetime(dates)
     return (
-        columns.str.replace("\n", "_")
-        .str.replace("-", "_")
-        .str.replace(" ", "_")
-        .str.replace(r"[^a-zA-Z0-9_]", "", regex=True)
-        .str.upper()
+        pd.to_numeric(player_ids).astype("int64") * 100_000_000
+        + dates.dt.year * 10_000
+        + dates.dt.month * 100
+        + dates.dt.day
     )
 
 
@@ -74,14 +89,14 @@ def ensure_unique_index(engine):
 
 
 def load_existing_absence_keys(engine):
-    """Returns set of 'PLAYER_ID_DATE' keys already in player_absences.
-    Empty set if the table doesn't exist yet (first run)."""
+    """Returns the set of (PLAYER_ID, DATE) keys (see _player_date_keys) already
+    in player_absences. Empty set if the table doesn't exist yet (first run)."""
     try:
         df = pd.read_sql(
             f'SELECT DISTINCT "PLAYER_ID", "DATE" FROM {ABSENCES_TABLE_NAME}',
             engine,
-        )
-        return set(df["PLAYER_ID"].astype(str) + "_" + df["DATE"].astype(str))
+        ).dropna()
+        return set(_player_date_keys(df["PLAYER_ID"], df["DATE"]).tolist())
     except Exception as e:
         if "no such table" in str(e):
             return set()
@@ -89,24 +104,23 @@ def load_existing_absence_keys(engine):
 
 
 def _load_box_score_keys(engine):
-    """Returns set of 'PLAYER_ID_DATE' keys already present in player_logs
+    """Returns the set of (PLAYER_ID, DATE) keys already present in player_logs
     (box scores), used to resolve the box-score-wins conflict policy.
 
     Tolerates a missing player_logs table (a standalone backfill_player_absences.py
     run can call this before any box scores exist) -- treated as an empty key set
     rather than raising.
 
-    The absence side normalizes DATE to %Y-%m-%d (see ingest_absences), so the
-    stored player_logs.DATE is re-normalized here too before building the key --
+    Both sides go through _player_date_keys, which parses DATE before keying --
     otherwise a differently-formatted box-score DATE (e.g. "2025-11-01 00:00:00")
     would silently fail to match and let an absence row through for a date the
-    player actually played. Mirrors daily_player_upload.py's own dedup, which
-    likewise re-normalizes stored DATE before comparing.
+    player actually played.
     """
     try:
-        df = pd.read_sql('SELECT "PLAYER_ID", "DATE" FROM player_logs', engine)
-        dates = pd.to_datetime(df["DATE"]).dt.strftime("%Y-%m-%d")
-        return set(df["PLAYER_ID"].astype(str) + "_" + dates)
+        df = pd.read_sql(
+            'SELECT "PLAYER_ID", "DATE" FROM player_logs', engine
+        ).dropna()
+        return set(_player_date_keys(df["PLAYER_ID"], df["DATE"]).tolist())
     except Exception as e:
         if "no such table" in str(e):
             return set()
@@ -129,7 +143,7 @@ def ingest_absences(file_path, engine, existing_keys):
     ensure_unique_index(engine)
 
     try:
-        df = pd.read_excel(file_path, sheet_name=ABSENCE_SHEET_NAME)
+        df = pd.read_excel(file_path, sheet_name=ABSENCE_SHEET_NAME, engine="calamine")
     except ValueError:
         # Sheet not present in this workbook (e.g. a season that predates it).
         return 0, False
@@ -149,7 +163,8 @@ def ingest_absences(file_path, engine, existing_keys):
         )
 
     # --- Normalizations ---
-    df["DATE"] = pd.to_datetime(df["DATE"]).dt.strftime("%Y-%m-%d")
+    dates = pd.to_datetime(df["DATE"])
+    df["DATE"] = dates.dt.strftime("%Y-%m-%d")
     df["GAME_ID"] = df["GAME_ID"].astype(int)
     df["PLAYER_ID"] = df["PLAYER_ID"].astype(int)
 
@@ -170,7 +185,7 @@ def ingest_absences(file_path, engine, existing_keys):
     )
 
     # --- Conflict filter: box score wins ---
-    df["absence_key"] = df["PLAYER_ID"].astype(str) + "_" + df["DATE"].astype(str)
+    df["absence_key"] = _player_date_keys(df["PLAYER_ID"], dates)
     box_score_keys = _load_box_score_keys(engine)
     conflict_mask = df["absence_key"].isin(box_score_keys)
     if conflict_mask.any():
@@ -185,24 +200,25 @@ def ingest_absences(file_path, engine, existing_keys):
     if truly_new_df.empty:
         return 0, True
 
-    # --- Learn new players into dim_players (same pattern as daily_player_upload) ---
-    new_players_df = truly_new_df[["PLAYER_ID", "PLAYER"]].drop_duplicates(
-        subset=["PLAYER_ID"]
-    )
-    existing_players_df = pd.read_sql(
-        f'SELECT "PLAYER_ID" FROM {PLAYERS_TABLE_NAME}', engine
-    )
-    existing_ids = set(existing_players_df["PLAYER_ID"])
-    truly_new_players_df = new_players_df.loc[
-        ~new_players_df["PLAYER_ID"].isin(existing_ids)
-    ]
-    if not truly_new_players_df.empty:
-        print(
-            f"  > Adding {len(truly_new_players_df)} new player(s) to {PLAYERS_TABLE_NAME} from absences..."
+    # --- Learn new players into dim_players (same helper as both log uploads) ---
+    # The check runs in SQL, so no per-file read of dim_players is needed -- and
+    # none could go stale, since the box-score load for this same file may have
+    # just learned players of its own.
+    with engine.begin() as conn:
+        db_utils.create_players_table(conn)
+        truly_new_df[["PLAYER_ID", "PLAYER"]].to_sql(
+            PLAYERS_STAGE_TABLE_NAME,
+            con=conn,
+            if_exists="replace",
+            index=False,
+            method="multi",
+            chunksize=INSERT_CHUNKSIZE,
         )
-        # dim_players uses PLAYER_NAME (same rename as daily_player_upload).
-        truly_new_players_df.rename(columns={"PLAYER": "PLAYER_NAME"}).to_sql(
-            PLAYERS_TABLE_NAME, con=engine, if_exists="append", index=False
+        new_players = db_utils.learn_players(conn, PLAYERS_STAGE_TABLE_NAME)
+        conn.exec_driver_sql(f"DROP TABLE {PLAYERS_STAGE_TABLE_NAME}")
+    if new_players:
+        print(
+            f"  > Added {new_players} new player(s) to {PLAYERS_TABLE_NAME} from absences."
         )
 
     # --- Append surviving rows to player_absences ---
@@ -219,7 +235,14 @@ def ingest_absences(file_path, engine, existing_keys):
             "ABSENCE_TYPE",
         ]
     ]
-    insert_df.to_sql(ABSENCES_TABLE_NAME, con=engine, if_exists="append", index=False)
+    insert_df.to_sql(
+        ABSENCES_TABLE_NAME,
+        con=engine,
+        if_exists="append",
+        index=False,
+        method="multi",
+        chunksize=INSERT_CHUNKSIZE,
+    )
     ensure_unique_index(engine)  # idempotent; creates index on first run
 
     existing_keys.update(truly_new_df["absence_key"])
@@ -1,19 +1,41 @@
 import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from . import config
 
+# In-process cache of the last credentials returned, keyed on token.json's mtime.
+# Repeat calls in the same run reuse them instead of re-reading and re-parsing
+# the token file; any rewrite of token.json (new mtime) forces a reload.
+_CREDS_CACHE = None
+_TOKEN_MTIME = None
+
+
+def _token_mtime():
+    """Returns token.json's modification time, or None if the file doesn't exist."""
+    try:
+        return os.stat(config.TOKEN_FILE).st_mtime
+    except FileNotFoundError:
+        return None
+
 
 def authenticate_google_drive():
     """
     Authenticates the user using the 'InstalledAppFlow' (3-Legged OAuth).
     Loads credentials explicitly from local files to avoid ADC conflicts.
     """
+    global _CREDS_CACHE, _TOKEN_MTIME
+
+    token_mtime = _token_mtime()
+
+    # 0. Reuse the credentials from an earlier call if token.json is unchanged
+    if _CREDS_CACHE is not None and _CREDS_CACHE.valid and _TOKEN_MTIME == token_mtime:
+        return _CREDS_CACHE
+
     creds = None
 
     # 1. Check for existing token.json (Persistence Strategy)
-    if os.path.exists(config.TOKEN_FILE):
+    if token_mtime is not None:
+        # deferred: the google-auth stack is slow to import and unused on a cache hit
+        from google.oauth2.credentials import Credentials
+
         creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
 
     # 2. If no valid credentials, log in
@@ -21,6 +43,8 @@ def authenticate_google_drive():
         if creds and creds.expired and creds.refresh_token:
             # Auto-refresh if expired but refresh token exists
             print("Refreshing access token...")
+            from google.auth.transport.requests import Request  # deferred: refresh only
+
             creds.refresh(Request())
         else:
             # Launch the browser for initial login
@@ -30,6 +54,8 @@ def authenticate_google_drive():
                     f"Missing {config.CREDENTIALS_FILE}. Did you download it from GCP?"
                 )
 
+            from google_auth_oauthlib.flow import InstalledAppFlow  # deferred: browser login only
+
             flow = InstalledAppFlow.from_client_secrets_file(
                 config.CREDENTIALS_FILE, config.SCOPES
             )
@@ -39,5 +65,7 @@ def authenticate_google_drive():
         # 3. Save the new credentials for next time
         with open(config.TOKEN_FILE, "w") as token:
             token.write(creds.to_json())
+        token_mtime = _token_mtime()
 
+    _CREDS_CACHE, _TOKEN_MTIME = creds, token_mtime
     return creds
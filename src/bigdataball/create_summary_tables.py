@@ -1,9 +1,13 @@
+import csv
 import pandas as pd
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.types import Integer, Float  # <--- Added this
+from contextlib import ExitStack
 from datetime import datetime
 import os
+import re
 import numpy as np
+from . import db_utils
 from . import paths
 
 # --- 1. Configuration ---
@@ -18,9 +22,88 @@ LOGS_TABLE_NAME = "fantasy_logs"
 MAP_TEAMS_TABLE_NAME = "map_teams"
 DIM_PLAYERS_TABLE_NAME = "dim_players"
 AVERAGES_TABLE_NAME = "fantasy_averages"
+SEASON_SEGMENTS_TABLE_NAME = "season_segments"  # per-run TEMP table, never persisted
+
+# Convenience views over fantasy_averages and the SEASON_TYPE each one selects
+SEASON_TYPE_VIEWS = {
+    "vw_player_averages_regular_season": "Regular",
+    "vw_player_averages_playoffs": "Playoffs",
+}
+
+# Rows per multi-row INSERT when writing fantasy_averages. 500 rows x ~28 columns
+# stays well under SQLite's 32,766 bound-parameter limit per statement.
+INSERT_CHUNKSIZE = 500
+
+# Rows fetched per cursor round-trip, and the file buffer size, for the CSV export.
+CSV_FETCH_SIZE = 10000
+CSV_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# SEASON_SEGMENT patterns for each SEASON_TYPE (checked in this order)
+REGULAR_SEASON_PATTERN = re.compile(r"Regular Season|In-Season Tournament")
+PLAYOFFS_PATTERN = re.compile(r"Playoffs|Play-In")
+
+# First 4-digit year in a SEASON_SEGMENT (e.g. '2024-25 NBA Regular Season' -> '2024')
+SEASON_YEAR_PATTERN = re.compile(r"(\d{4})")
 
 # Initialize Engine
-engine = create_engine(f"sqlite:///{DB_PATH}")
+# Read tuning for the full-table scans in this module (GROUP BY sorter, the
+# season-segments TEMP table): the shared defaults plus a 128 MB page cache and
+# up to 1 GB of memory-mapped reads.
+engine = db_utils.tune_engine(
+    create_engine(f"sqlite:///{DB_PATH}"),
+    pragmas=db_utils.CONNECTION_PRAGMAS
+    + ("PRAGMA cache_size=-131072", "PRAGMA mmap_size=1073741824"),
+)
+
+
+def _season_type(segment):
+    """Returns 'Regular' or 'Playoffs' for one SEASON_SEGMENT value, or None."""
+    if REGULAR_SEASON_PATTERN.search(segment):
+        return "Regular"
+    if PLAYOFFS_PATTERN.search(segment):
+        return "Playoffs"
+    return None
+
+
+def _season_key(segment, season_type):
+    """
+    Returns the SEASON_KEY for one SEASON_SEGMENT value: '2023-24' for the
+    Regular season, '2024' for Playoffs, or None if no 4-digit year is found.
+    """
+    match = SEASON_YEAR_PATTERN.search(segment)
+    if season_type is None or match is None:
+        return None
+    start_year = match.group(1)
+    if season_type == "Playoffs":
+        return start_year
+    return f"{start_year}-{(int(start_year) + 1) % 100:02d}"
+
+
+def _safe_ratio(numerator, denominator):
+    """
+    Element-wise numerator / denominator, with 0 wherever the denominator is 0
+    or NaN. Divides in a single pass instead of materializing inf/NaN and then
+    replacing them.
+    """
+    numerator = numerator.to_numpy(dtype=float)
+    denominator = denominator.to_numpy(dtype=float)
+    valid = (denominator != 0) & ~np.isnan(denominator) & ~np.isnan(numerator)
+    return np.divide(
+        numerator, denominator, out=np.zeros_like(numerator), where=valid
+    )
+
+
+def _sample_variance_sql(column):
+    """
+    Returns a SQL aggregate expression for the sample variance of `column`
+    (NULL when the group has fewer than two non-NULL values, like pandas' std).
+    SQLite has no built-in STDDEV, so the square root is taken in pandas.
+    """
+    return (
+        f"CASE WHEN COUNT({column}) > 1 THEN "
+        f"(SUM({column} * 1.0 * {column}) - SUM({column}) * 1.0 * SUM({column}) / COUNT({column})) "
+        f"/ (COUNT({column}) - 1) END"
+    )
 
 
 def create_fantasy_averages_table():
@@ -51,185 +134,209 @@ def create_fantasy_averages_table():
                 print(f"Available tables are: {available_tables}")
             return False  # Stop execution
 
-        # --- Step 1: Load and Join Data ---
-        df = pd.read_sql_table(LOGS_TABLE_NAME, engine)
-        map_teams_df = pd.read_sql_table(MAP_TEAMS_TABLE_NAME, engine)
-        dim_players_df = pd.read_sql_table(DIM_PLAYERS_TABLE_NAME, engine)
-        print(
-            f"Loaded {len(df)} logs, {len(map_teams_df)} team mappings, and {len(dim_players_df)} players."
-        )
-
-        # Drop the inconsistent 'PLAYER' column from logs; we will use the canonical name from dim_players.
-        df.drop(columns=["PLAYER"], inplace=True)
-
-        # Join with dim_players on PLAYER_ID to get the canonical player name.
-        df = pd.merge(
-            df, dim_players_df[["PLAYER_ID", "PLAYER_NAME"]], on="PLAYER_ID", how="left"
-        )
-        # Rename PLAYER_NAME to PLAYER for consistency in the rest of the script.
-        df.rename(columns={"PLAYER_NAME": "PLAYER"}, inplace=True)
-
-        # Join with map_teams to get the abbreviation
-        df = pd.merge(
-            df,
-            map_teams_df[["RAW_TEAM_NAME", "TEAM_ABBREVIATION"]],
-            left_on="TEAM",
-            right_on="RAW_TEAM_NAME",
-            how="left",
+        # --- Step 1: Classify Season Segments ---
+        # SEASON_SEGMENT only holds a handful of distinct values, so the Regular /
+        # Playoffs classification and SEASON_KEY parsing run once per distinct value
+        # here; SQLite joins the result back onto every log row in Step 2.
+        segments_df = pd.read_sql_query(
+            f"SELECT DISTINCT SEASON_SEGMENT FROM {LOGS_TABLE_NAME} "
+            "WHERE SEASON_SEGMENT IS NOT NULL",
+            engine,
         )
-        df.drop(columns=["RAW_TEAM_NAME"], inplace=True)
-
-        # --- Step 2: Pre-calculation & Data Cleaning ---
 
         # Define Season Type (Regular or Playoffs)
-        conditions = [
-            df["SEASON_SEGMENT"].str.contains("Regular Season|In-Season Tournament"),
-            df["SEASON_SEGMENT"].str.contains("Playoffs|Play-In"),
+        segments_df["SEASON_TYPE"] = [
+            _season_type(segment) for segment in segments_df["SEASON_SEGMENT"]
         ]
-        choices = ["Regular", "Playoffs"]
-        df["SEASON_TYPE"] = np.select(conditions, choices, default=None)
 
         # Define Season Key
-        # For Regular Season: '2023-24'
-        # Use a regular expression to reliably extract the first 4-digit year.
-        reg_season_mask = df["SEASON_TYPE"] == "Regular"
-        start_year_series = df.loc[reg_season_mask, "SEASON_SEGMENT"].str.extract(
-            r"(\d{4})", expand=False
-        )
-
-        # Convert to numeric, coercing errors to NaN (Not a Number)
-        start_year_numeric = pd.to_numeric(start_year_series, errors="coerce")
+        # Parsed per distinct segment (a dozen or so strings), not per log row.
+        segments_df["SEASON_KEY"] = [
+            _season_key(segment, season_type)
+            for segment, season_type in zip(
+                segments_df["SEASON_SEGMENT"], segments_df["SEASON_TYPE"]
+            )
+        ]
 
-        # Identify and report rows that could not be converted
-        invalid_rows = start_year_numeric.isna() & reg_season_mask
+        # Identify and report segments whose year could not be parsed
+        invalid_rows = (segments_df["SEASON_TYPE"] == "Regular") & segments_df[
+            "SEASON_KEY"
+        ].isna()
         if invalid_rows.any():
             print(
                 "\n--- WARNING: Could not parse year from some SEASON_SEGMENT values. ---"
             )
             print("These rows will be skipped. Problematic values:")
-            print(df.loc[invalid_rows, "SEASON_SEGMENT"].unique())
+            print(segments_df.loc[invalid_rows, "SEASON_SEGMENT"].unique())
             print(
                 "---------------------------------------------------------------------\n"
             )
 
-        # Calculate end year and format the SEASON_KEY, skipping invalid (NaN) rows
-        end_year_series = (start_year_numeric + 1).astype(str).str.slice(2, 4)
-        df.loc[reg_season_mask, "SEASON_KEY"] = (
-            start_year_series + "-" + end_year_series
-        )
-
-        # For Playoffs: '2024' - Use regex to reliably get the 4-digit year
-        playoff_mask = df["SEASON_TYPE"] == "Playoffs"
-        df.loc[playoff_mask, "SEASON_KEY"] = df.loc[
-            playoff_mask, "SEASON_SEGMENT"
-        ].str.extract(r"(\d{4})", expand=False)
+        # Drop any segments that don't match a season type; their logs are skipped
+        segments_df = segments_df.dropna(subset=["SEASON_TYPE", "SEASON_KEY"])
 
-        # Drop any rows that don't match a season type
-        df.dropna(subset=["SEASON_TYPE", "SEASON_KEY"], inplace=True)
+        # Integer code per (SEASON_TYPE, SEASON_KEY) pair, so SQLite groups on ints
+        # rather than on the two text columns (several segments share one code,
+        # e.g. a Regular Season and its In-Season Tournament).
+        segments_df["SEASON_CODE"] = segments_df.groupby(
+            ["SEASON_TYPE", "SEASON_KEY"]
+        ).ngroup()
 
-        # --- NEW: Add columns for L30FPPM calculation ---
-        # Ensure DATE column is datetime for comparison
-        df["DATE"] = pd.to_datetime(df["DATE"])
+        # L30 window for the L30FPPM calculation (DATE is stored as 'YYYY-MM-DD')
         thirty_days_ago = pd.Timestamp.now().normalize() - pd.Timedelta(days=30)
 
-        # Create conditional columns for points and minutes in the last 30 days
-        # Use np.nan so these values are ignored in sums if they don't meet the condition
-        df["L30_DK_POINTS"] = np.where(df["DATE"] >= thirty_days_ago, df["DK_POINTS"], np.nan)
-        df["L30_MINUTES"] = np.where(df["DATE"] >= thirty_days_ago, df["MINUTES"], np.nan)
-
-        # Calculate per-game metrics, handling division by zero
-        df["GAME_FPPM"] = (
-            (df["DK_POINTS"] / df["MINUTES"]).replace([np.inf, -np.inf], 0).fillna(0)
-        )
-
-        # Create conditional columns for starter-only stats (will be NULL for non-starters)
-        df["GS_DK_POINTS"] = np.where(df["STARTED"] == "Y", df["DK_POINTS"], np.nan)
-        df["GS_MINUTES"] = np.where(df["STARTED"] == "Y", df["MINUTES"], np.nan)
-        df["GS_GAME_FPPM"] = np.where(df["STARTED"] == "Y", df["GAME_FPPM"], np.nan)
-
-        # --- Step 3: Aggregation ---
-        # Define the aggregations we want to perform.
-        # Pandas' 'std' calculates sample standard deviation by default.
-        aggregations = {
-            "DATE": "count",  # This will be renamed to GP
-            "STARTED": lambda x: (x == "Y").sum(),  # This will be renamed to GS
-            "DK_SALARY": "mean",
-            "DK_POINTS": ["mean", "std", "sum"],
-            "MINUTES": ["mean", "std", "sum"],
-            "GAME_FPPM": "std",  # Only need std dev of per-game FPPM for volatility
-            "USAGE": "mean",
-            "GS_DK_POINTS": ["mean", "std", "sum"],
-            "GS_MINUTES": ["mean", "std", "sum"],
-            "GS_GAME_FPPM": "std",  # Only need std dev of per-game FPPM for volatility
-            "L30_DK_POINTS": "sum", # Sum of points in last 30 days
-            "L30_MINUTES": "sum", # Sum of minutes in last 30 days
-        }
-
-        # Group by season, player, and team, then aggregate
-        # Per user request: SEASON_TYPE, PLAYER, SEASON_KEY, TEAM_ABBREVIATION
-        # Adding PLAYER_ID to the grouping to preserve it as a unique identifier.
-        grouped = (
-            df.groupby(
-                [
-                    "SEASON_TYPE",
-                    "PLAYER_ID",
-                    "PLAYER",
-                    "SEASON_KEY",
-                    "TEAM_ABBREVIATION",
-                ]
+        # --- Step 2: Aggregate in SQLite ---
+        # The joins and the GROUP BY run inside SQLite, so only one row per group
+        # (not every log row) is ever materialized in pandas.
+        # INNER joins drop logs with no dim_players / map_teams match, exactly as
+        # pandas' groupby used to drop rows with a NaN PLAYER or TEAM_ABBREVIATION.
+        # AVG/COUNT skip NULLs and TOTAL() returns 0.0 for an all-NULL group, which
+        # matches pandas' mean/count/sum semantics. Conditional columns are NULL
+        # when the condition fails, so they drop out of the aggregates.
+        aggregation_sql = f"""
+            WITH logs AS (
+                SELECT
+                    s.SEASON_CODE,
+                    s.SEASON_TYPE,
+                    f.PLAYER_ID,
+                    d.PLAYER_NAME AS PLAYER,
+                    s.SEASON_KEY,
+                    m.TEAM_ABBREVIATION,
+                    f.DATE,
+                    -- Starter flag computed once per row; every GS stat reuses it
+                    COALESCE(f.STARTED = 'Y', 0) AS GS_FLAG,
+                    f.DK_SALARY,
+                    f.DK_POINTS,
+                    f.MINUTES,
+                    f.USAGE,
+                    -- Per-game FPPM; division by zero (or a NULL) counts as 0
+                    COALESCE(
+                        CASE WHEN f.MINUTES <> 0 THEN f.DK_POINTS * 1.0 / f.MINUTES END,
+                        0
+                    ) AS GAME_FPPM,
+                    -- ISO 'YYYY-MM-DD' text orders chronologically; no per-row date() parse
+                    f.DATE >= :thirty_days_ago AS IS_L30
+                FROM {LOGS_TABLE_NAME} f
+                JOIN {SEASON_SEGMENTS_TABLE_NAME} s
+                    ON f.SEASON_SEGMENT = s.SEASON_SEGMENT
+                -- One name per PLAYER_ID: a legacy dim_players created without
+                -- the PRIMARY KEY can repeat an ID, which would duplicate its logs
+                -- and double GP and every sum.
+                JOIN (
+                    SELECT PLAYER_ID, MIN(PLAYER_NAME) AS PLAYER_NAME
+                    FROM {DIM_PLAYERS_TABLE_NAME}
+                    GROUP BY PLAYER_ID
+                ) d
+                    ON f.PLAYER_ID = d.PLAYER_ID
+                JOIN {MAP_TEAMS_TABLE_NAME} m
+                    ON f.TEAM = m.RAW_TEAM_NAME
+                WHERE d.PLAYER_NAME IS NOT NULL
+                    AND m.TEAM_ABBREVIATION IS NOT NULL
+            ),
+            starter_logs AS (
+                -- Starter-only stats (NULL for non-starters)
+                SELECT
+                    *,
+                    CASE WHEN GS_FLAG THEN DK_POINTS END AS GS_DK_POINTS,
+                    CASE WHEN GS_FLAG THEN MINUTES END AS GS_MINUTES,
+                    CASE WHEN GS_FLAG THEN GAME_FPPM END AS GS_GAME_FPPM
+                FROM logs
             )
-            .agg(aggregations)
-            .reset_index()
-        )
-
-        # Flatten the multi-level column names (e.g., ('DK_POINTS', 'mean') -> 'DK_POINTS_mean')
-        grouped.columns = ["_".join(col).strip() for col in grouped.columns.values]
+            SELECT
+                -- SEASON_TYPE/SEASON_KEY are fixed by SEASON_CODE and PLAYER by
+                -- PLAYER_ID (one name per ID, see d), so MIN() just picks the one value.
+                MIN(SEASON_TYPE) AS SEASON_TYPE,
+                PLAYER_ID,
+                MIN(PLAYER) AS PLAYER,
+                MIN(SEASON_KEY) AS SEASON,
+                TEAM_ABBREVIATION AS TEAM,
+                COUNT(DATE) AS GP,
+                SUM(GS_FLAG) AS GS,
+                AVG(DK_SALARY) AS SALPG,
+                AVG(DK_POINTS) AS FPPG,
+                {_sample_variance_sql("DK_POINTS")} AS STDV_FPPG,
+                TOTAL(DK_POINTS) AS DK_POINTS_sum,
+                AVG(MINUTES) AS MPG,
+                {_sample_variance_sql("MINUTES")} AS STDV_MPG,
+                TOTAL(MINUTES) AS MINUTES_sum,
+                {_sample_variance_sql("GAME_FPPM")} AS STDV_FPPM,
+                AVG(USAGE) AS USG,
+                AVG(GS_DK_POINTS) AS GSFPPG,
+                {_sample_variance_sql("GS_DK_POINTS")} AS STDV_GSFPPG,
+                TOTAL(GS_DK_POINTS) AS GS_DK_POINTS_sum,
+                AVG(GS_MINUTES) AS GSMPG,
+                {_sample_variance_sql("GS_MINUTES")} AS STDV_GSMPG,
+                TOTAL(GS_MINUTES) AS GS_MINUTES_sum,
+                {_sample_variance_sql("GS_GAME_FPPM")} AS STDV_GSFPPM,
+                TOTAL(CASE WHEN IS_L30 THEN DK_POINTS END) AS L30_DK_POINTS_sum,
+                TOTAL(CASE WHEN IS_L30 THEN MINUTES END) AS L30_MINUTES_sum
+            FROM starter_logs
+            -- No ORDER BY: rows land in grouping order; readers that need an
+            -- order (the vw_daily_slate* views) sort for themselves.
+            GROUP BY SEASON_CODE, PLAYER_ID, TEAM_ABBREVIATION
+        """
+
+        with engine.begin() as connection:
+            # A TEMP table lives on this connection only and never touches the DB file.
+            connection.execute(
+                text(f"DROP TABLE IF EXISTS temp.{SEASON_SEGMENTS_TABLE_NAME}")
+            )
+            connection.execute(
+                text(
+                    f"CREATE TEMP TABLE {SEASON_SEGMENTS_TABLE_NAME} "
+                    "(SEASON_SEGMENT TEXT PRIMARY KEY, SEASON_TYPE TEXT, SEASON_KEY TEXT, "
+                    "SEASON_CODE INTEGER)"
+                )
+            )
+            if not segments_df.empty:
+                connection.execute(
+                    text(
+                        f"INSERT INTO {SEASON_SEGMENTS_TABLE_NAME} "
+                        "VALUES (:SEASON_SEGMENT, :SEASON_TYPE, :SEASON_KEY, :SEASON_CODE)"
+                    ),
+                    segments_df[
+                        ["SEASON_SEGMENT", "SEASON_TYPE", "SEASON_KEY", "SEASON_CODE"]
+                    ].to_dict("records"),
+                )
+            grouped = pd.read_sql_query(
+                text(aggregation_sql),
+                connection,
+                params={"thirty_days_ago": thirty_days_ago.strftime("%Y-%m-%d")},
+                # Key/count columns arrive as narrow ints instead of int64.
+                dtype={"PLAYER_ID": "int32", "GP": "int32", "GS": "int32"},
+            )
+            connection.execute(text(f"DROP TABLE temp.{SEASON_SEGMENTS_TABLE_NAME}"))
+        print(f"Aggregated logs into {len(grouped)} player/season/team groups.")
+
+        # --- Step 3: Calculate Metrics Post-Aggregation ---
+        # The STDV_* columns arrive from SQL holding the sample variance (NULL for
+        # single-game groups, like pandas' std); take the square root in place.
+        # Clip tiny negative rounding error before sqrt.
+        stdev_columns = [
+            "STDV_FPPG",
+            "STDV_MPG",
+            "STDV_FPPM",  # This is the volatility of per-game FPPM
+            "STDV_GSFPPG",
+            "STDV_GSMPG",
+            "STDV_GSFPPM",  # This is the volatility of per-game FPPM as a starter
+        ]
+        for col in stdev_columns:
+            grouped[col] = np.sqrt(grouped[col].astype(float).clip(lower=0))
 
-        # --- Step 3.5: Calculate Correct FPPM Metrics Post-Aggregation ---
         # The correct FPPM is sum of points / sum of minutes, not the average of game-by-game FPPMs.
-        # Handle division by zero for players with 0 total minutes.
-        grouped["FPPM"] = (
-            (grouped["DK_POINTS_sum"] / grouped["MINUTES_sum"])
-            .replace([np.inf, -np.inf], 0)
-            .fillna(0)
-        )
-        grouped["GSFPPM"] = (
-            (grouped["GS_DK_POINTS_sum"] / grouped["GS_MINUTES_sum"])
-            .replace([np.inf, -np.inf], 0)
-            .fillna(0)
+        # Players with 0 total minutes get 0.
+        grouped["FPPM"] = _safe_ratio(grouped["DK_POINTS_sum"], grouped["MINUTES_sum"])
+        grouped["GSFPPM"] = _safe_ratio(
+            grouped["GS_DK_POINTS_sum"], grouped["GS_MINUTES_sum"]
         )
 
         # Calculate L30FPPM
-        grouped["L30FPPM"] = (
-            (grouped["L30_DK_POINTS_sum"] / grouped["L30_MINUTES_sum"])
-            .replace([np.inf, -np.inf], 0)
-            .fillna(0)
+        grouped["L30FPPM"] = _safe_ratio(
+            grouped["L30_DK_POINTS_sum"], grouped["L30_MINUTES_sum"]
         )
 
         # --- Step 4: Clean Up and Save ---
-        # Rename columns to match our desired schema
-        rename_map = {
-            "PLAYER_ID_": "PLAYER_ID",
-            "SEASON_TYPE_": "SEASON_TYPE",
-            "PLAYER_": "PLAYER",
-            "SEASON_KEY_": "SEASON",
-            "TEAM_ABBREVIATION_": "TEAM",
-            "DATE_count": "GP",
-            "STARTED_<lambda>": "GS",
-            "DK_SALARY_mean": "SALPG",
-            "DK_POINTS_mean": "FPPG",
-            "DK_POINTS_std": "STDV_FPPG",
-            "MINUTES_mean": "MPG",
-            "MINUTES_std": "STDV_MPG",
-            "GAME_FPPM_std": "STDV_FPPM",  # This is the volatility of per-game FPPM
-            "USAGE_mean": "USG",
-            "GS_DK_POINTS_mean": "GSFPPG",
-            "GS_DK_POINTS_std": "STDV_GSFPPG",
-            "GS_MINUTES_mean": "GSMPG",
-            "GS_MINUTES_std": "STDV_GSMPG",
-            "GS_GAME_FPPM_std": "STDV_GSFPPM",  # This is the volatility of per-game FPPM as a starter
-        }
-        final_df = grouped.rename(columns=rename_map)
+        final_df = grouped
 
         # Round the columns for clean output
         rounding_map = {
@@ -249,12 +356,17 @@ def create_fantasy_averages_table():
             "STDV_GSFPPM": 2,
             "L30FPPM": 2,
         }
-        final_df = final_df.round(rounding_map).fillna(
-            0
-        )  # Use fillna(0) to replace any NaN from std dev on single games
+        # Round column by column on the underlying arrays, replacing any NaN (std dev
+        # on single games, starter averages with no starts) with 0. Only these
+        # columns can hold NaN, so the frame is never copied as a whole.
+        for col, decimals in rounding_map.items():
+            final_df[col] = np.nan_to_num(
+                np.round(final_df[col].to_numpy(dtype=float), decimals), nan=0.0
+            )
 
         # Convert columns that should be whole numbers to integer type in the dataframe
-        integer_columns = ["PLAYER_ID", "GP", "GS", "SALPG"]
+        # (PLAYER_ID, GP and GS are already read as int32 in Step 2)
+        integer_columns = ["SALPG"]
         for col in integer_columns:
             final_df[col] = final_df[col].astype(int)
 
@@ -280,14 +392,19 @@ def create_fantasy_averages_table():
             "L30FPPM": Float(),
         }
 
-        # Save the final DataFrame to a new SQL table
-        final_df.to_sql(
-            AVERAGES_TABLE_NAME,
-            engine,
-            if_exists="replace",
-            index=False,
-            dtype=sql_types,  # <--- The critical fix
-        )
+        # Save the final DataFrame to a new SQL table.
+        # One transaction for the DROP/CREATE and every INSERT, and multi-row
+        # INSERT statements instead of one statement per row.
+        with engine.begin() as connection:
+            final_df.to_sql(
+                AVERAGES_TABLE_NAME,
+                connection,
+                if_exists="replace",
+                index=False,
+                dtype=sql_types,  # <--- The critical fix
+                method="multi",
+                chunksize=INSERT_CHUNKSIZE,
+            )
         print(
             f"Successfully created/updated '{AVERAGES_TABLE_NAME}' table with {len(final_df)} rows."
         )
@@ -311,16 +428,12 @@ def create_convenience_views():
 
     # Define the views to be created in a structured way
     views_to_create = {
-        "vw_player_averages_regular_season": f"""
-            CREATE VIEW {{view_name}} AS
-            SELECT * FROM {AVERAGES_TABLE_NAME}
-            WHERE SEASON_TYPE = 'Regular'
-        """,
-        "vw_player_averages_playoffs": f"""
+        view_name: f"""
             CREATE VIEW {{view_name}} AS
             SELECT * FROM {AVERAGES_TABLE_NAME}
-            WHERE SEASON_TYPE = 'Playoffs'
-        """,
+            WHERE SEASON_TYPE = '{season_type}'
+        """
+        for view_name, season_type in SEASON_TYPE_VIEWS.items()
     }
 
     for view_name, create_sql_template in views_to_create.items():
@@ -332,10 +445,11 @@ def create_convenience_views():
             # Use a dedicated transaction for each view. This isolates failures,
             # preventing an issue with one view from affecting the other.
             # The `with engine.begin()` block ensures the DROP and CREATE
-            # are committed together atomically.
+            # are committed together atomically. Static DDL goes straight to
+            # the driver; there is nothing for text() to compile or bind.
             with engine.begin() as connection:
-                connection.execute(text(drop_sql))
-                connection.execute(text(create_sql))
+                connection.exec_driver_sql(drop_sql)
+                connection.exec_driver_sql(create_sql)
 
             print(f"Successfully created/updated '{view_name}'.")
             successful_views.append(view_name)
@@ -350,7 +464,9 @@ def create_convenience_views():
 
 def export_views_to_csv(views_to_export: list):
     """
-    Reads data from the database views and exports them to CSV files.
+    Exports the convenience views to CSV files. The views are SEASON_TYPE
+    filters over fantasy_averages, so the table is read in a single pass and
+    each row is written to its view's file.
 
     Args:
         views_to_export (list): A list of view names to export. This function
@@ -376,25 +492,71 @@ def export_views_to_csv(views_to_export: list):
     timestamp = datetime.now().strftime("%m-%d-%Y_%H%M%S")
 
     try:
-        # Iterate over the list of views that were successfully created
-        for view_name in views_to_export:
-            if view_name not in view_file_map:
-                continue  # Skip if we don't have a file mapping for this view
-            base_file_name = view_file_map[view_name]
-            # Split the base filename into name and extension
-            name_part, extension = os.path.splitext(base_file_name)
-            # Create the new filename with the timestamp
-            new_file_name = f"{name_part}_{timestamp}{extension}"
-
-            # Construct the full path for the output file
-            output_path = os.path.join(CSV_EXPORT_DIR, new_file_name)
-
-            # Read the view data into a pandas DataFrame
-            df = pd.read_sql_query(f"SELECT * FROM {view_name}", engine)
-
-            # Save the DataFrame to a CSV file, without the pandas index
-            df.to_csv(output_path, index=False)
+        with ExitStack() as stack:
+            # Open one CSV writer per successfully created view, keyed by the
+            # SEASON_TYPE that view filters on
+            writers = {}
+            exported_files = []
+            for view_name in views_to_export:
+                season_type = SEASON_TYPE_VIEWS.get(view_name)
+                if season_type is None or view_name not in view_file_map:
+                    continue  # Skip if we don't have a file mapping for this view
+                base_file_name = view_file_map[view_name]
+                # Split the base filename into name and extension
+                name_part, extension = os.path.splitext(base_file_name)
+                # Create the new filename with the timestamp
+                new_file_name = f"{name_part}_{timestamp}{extension}"
+
+                # Construct the full path for the output file
+                output_path = os.path.join(CSV_EXPORT_DIR, new_file_name)
+                f = stack.enter_context(
+                    open(
+                        output_path,
+                        "w",
+                        newline="",
+                        encoding="utf-8",
+                        buffering=CSV_WRITE_BUFFER_SIZE,
+                    )
+                )
+                writers[season_type] = csv.writer(f)
+                exported_files.append((view_name, new_file_name))
+
+            if not writers:
+                print("None of the requested views can be exported, skipping CSV export.")
+                return
+
+            # Each view is just a SEASON_TYPE filter over fantasy_averages, so scan
+            # the table once and route every row to its view's file, streaming
+            # straight from the DBAPI cursor in fixed-size batches without
+            # building a DataFrame.
+            raw_connection = engine.raw_connection()
+            stack.callback(raw_connection.close)
+            cursor = raw_connection.cursor()
+            cursor.arraysize = CSV_FETCH_SIZE
+            cursor.execute(f"SELECT * FROM {AVERAGES_TABLE_NAME}")
+            columns = [description[0] for description in cursor.description]
+            season_type_index = columns.index("SEASON_TYPE")
+            for writer in writers.values():
+                writer.writerow(columns)
+            # Rows whose SEASON_TYPE no view selects are left out and reported below.
+            known_season_types = set(SEASON_TYPE_VIEWS.values())
+            unknown_rows = 0
+            while rows := cursor.fetchmany():
+                for season_type, writer in writers.items():
+                    writer.writerows(
+                        row for row in rows if row[season_type_index] == season_type
+                    )
+                unknown_rows += sum(
+                    row[season_type_index] not in known_season_types for row in rows
+                )
+
+        for view_name, new_file_name in exported_files:
             print(f"Successfully exported '{view_name}' to '{new_file_name}'.")
+        if unknown_rows:
+            print(
+                f"  > WARNING: skipped {unknown_rows} {AVERAGES_TABLE_NAME} rows with a "
+                "SEASON_TYPE no view selects."
+            )
 
         print("--- CSV export complete ---")
     except Exception as e:
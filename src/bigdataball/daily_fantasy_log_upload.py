@@ -9,15 +9,18 @@ import pandas as pd
 from sqlalchemy import create_engine, text, Integer
 import glob
 import os
+import re
 from . import create_summary_tables
 from . import export_slate_averages_vw
 from . import export_playoffs_slate_averages_vw
 from . import export_slate_averages_csv
 from . import daily_player_upload
+from . import db_utils
 from . import drive_ingestion
 from . import email_notifier
 from . import mappings
 from . import paths
+from . import player_feed
 from datetime import datetime
 
 
@@ -35,7 +38,41 @@ os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 # Database Configuration
 LOGS_TABLE_NAME = "fantasy_logs"
 PLAYERS_TABLE_NAME = "dim_players"
-engine = create_engine(f"sqlite:///{DB_PATH}")
+# Scratch table the run's cleaned rows are loaded into before the dedup INSERT;
+# created and dropped inside the load transaction.
+STAGE_TABLE_NAME = "_stage_fantasy_logs"
+
+# Separators for player_feed.sanitize_column: unlike the player feed, only
+# newlines/spaces become "_" here (a hyphen is stripped). One character at a time,
+# never collapsed -- the rename map relies on the resulting double underscores
+# (e.g. "DAYS_REST__3SEASON...").
+HEADER_SEPARATOR_PATTERN = re.compile(r"[\n ]")
+
+# Sanitized feed header -> stored fantasy_logs column. Applied in the same pass as
+# sanitization; headers not listed here keep their sanitized name.
+RENAME_MAP = {
+    "BIGDATABALL_DATASET": "SEASON_SEGMENT",
+    "OWN_TEAM": "TEAM",
+    "OPPONENT_TEAM": "OPPONENT",
+    "STARTER_YN": "STARTED",
+    "VENUE_RHN": "VENUE",
+    "USAGE_RATE": "USAGE",
+    "DAYS_REST__3SEASON_DEBUT_0_BACKTOBACK": "DAYS_REST",
+    "DRAFTKINGS": "DK_POSITION",
+    "FOR_DRAFTKINGS_CLASSIC_CONTESTS": "DK_SALARY",
+    "DRAFTKINGS1": "DK_POINTS",
+}
+# Non-DraftKings site columns, dropped after renaming.
+COLUMNS_TO_DROP = [
+    "FANDUEL",
+    "YAHOO",
+    "FOR_FANDUEL_FULL_ROSTER_CONTESTS",
+    "FOR_YAHOO_FULL_SLATE_CONTESTS",
+    "FANDUEL1",
+    "YAHOO1",
+]
+
+engine = db_utils.tune_engine(create_engine(f"sqlite:///{DB_PATH}"))
 
 
 def ensure_unique_index():
@@ -62,22 +99,32 @@ def ensure_unique_index():
 
 def initialize_database():
     """Creates the dim_players table if it doesn't exist."""
-    with engine.connect() as conn:
-        conn.execute(
-            text(
-                f"""
-            CREATE TABLE IF NOT EXISTS {PLAYERS_TABLE_NAME} (
-                "PLAYER_ID" INTEGER PRIMARY KEY,
-                "PLAYER_NAME" TEXT
-            );
-            """
-            )
-        )
-        # Also ensure the main logs table exists
-        conn.commit()
+    with engine.begin() as conn:
+        db_utils.create_players_table(conn)
     ensure_unique_index()
 
 
+def load_staged_logs(conn, staged_logs):
+    """
+    Inserts the rows of `staged_logs` whose (PLAYER_ID, DATE) is not yet in
+    fantasy_logs, and learns any PLAYER_IDs missing from dim_players, all on `conn`
+    (see db_utils.insert_new_logs).
+    """
+    id_dtype = {
+        c: Integer() for c in ("PLAYER_ID", "GAME_ID") if c in staged_logs.columns
+    }
+    # Creates fantasy_logs on the first run; a no-op once the table exists.
+    staged_logs.head(0).to_sql(
+        LOGS_TABLE_NAME, con=conn, if_exists="append", index=False, dtype=id_dtype
+    )
+    new_logs, new_players = db_utils.insert_new_logs(
+        conn, LOGS_TABLE_NAME, STAGE_TABLE_NAME, staged_logs, dtype=id_dtype
+    )
+    print(f"Added {new_logs} new game logs to {LOGS_TABLE_NAME}.")
+    if new_players:
+        print(f"Added {new_players} new players to {PLAYERS_TABLE_NAME}.")
+
+
 def main():
     """
     Finds all new .xlsx files, processes them into the database ensuring no
@@ -126,46 +173,6 @@ def main():
         print(f"*** {error_msg} ***")
         pipeline_errors.append(error_msg)
 
-    # --- Pre-load existing logs ---
-    # Try to load the logs that are already in the database.
-    # If the table doesn't exist (first run), create an empty DataFrame.
-    try:
-        existing_logs_df = pd.read_sql(
-            f'SELECT DISTINCT "PLAYER_ID", "DATE" FROM {LOGS_TABLE_NAME}', engine
-        )
-        if not existing_logs_df.empty:
-            print(f"Found {len(existing_logs_df)} existing logs in the database.")
-            # Normalize the DB-side PLAYER_ID to an int-formatted string BEFORE
-            # building the key, so it matches the incoming int-cast key ("12345")
-            # regardless of the column's current storage affinity. An un-migrated
-            # (still-REAL) fantasy_logs reads back as float64 -> ".astype(str)" would
-            # yield "12345.0", which never matches the incoming "12345" and makes
-            # every historical row look "new". Normalizing here makes dedup correct
-            # whether or not patch_fantasy_id_types.py has run yet, removing the
-            # deploy-ordering hazard between the incoming int cast and the migration.
-            existing_logs_df["PLAYER_ID"] = pd.to_numeric(
-                existing_logs_df["PLAYER_ID"], errors="coerce"
-            ).astype("Int64")
-            # Create the log_key from the loaded data
-            existing_logs_df["log_key"] = (
-                existing_logs_df["PLAYER_ID"].astype(str)
-                + "_"
-                + pd.to_datetime(existing_logs_df["DATE"]).dt.strftime("%Y-%m-%d")
-            )
-        else:
-            # If the table exists but is empty, ensure the log_key column exists
-            existing_logs_df["log_key"] = pd.Series(dtype="str")
-
-    except Exception as e:
-        if "no such table" in str(e):
-            print("First run: `fantasy_logs` table not found. Will create it.")
-            # Create an empty DataFrame with all necessary columns
-            existing_logs_df = pd.DataFrame(columns=["PLAYER_ID", "DATE", "log_key"])
-        else:
-            # For any other database error, stop the script.
-            print(f"A database error occurred: {e}")
-            return
-
     # Sort the files to process them in chronological order, which is good practice.
     files_to_process = sorted(glob.glob(os.path.join(NEW_FILES_FOLDER, "*.xlsx")))
 
@@ -174,65 +181,46 @@ def main():
     else:
         print(f"Found {len(files_to_process)} new file(s) to process...")
 
-    # Initialize ONCE before the loop so keys added per file accumulate across files
-    # processed in the same run (prevents re-inserting logs from an earlier file).
-    existing_log_keys = set(existing_logs_df["log_key"]) if files_to_process else set()
-
     fantasy_logs_count = 0
     fantasy_logs_overwritten = 0
     fantasy_rows_dropped = 0
+
+    # Cleaned rows and archive moves are collected across the whole run and loaded
+    # in one transaction after the loop; de-duplication against fantasy_logs happens
+    # there, in SQL. Files are only archived once that transaction has committed.
+    staged_frames = []
+    pending_moves = []
+
     for file_path in files_to_process:
         file_name = os.path.basename(file_path)
         print(f"--- Processing: {file_name} ---")
 
         try:
             # --- 4a. Extract & Transform ---
-            new_data = pd.read_excel(file_path, header=1)
+            # calamine parses the workbook natively instead of through openpyxl's
+            # pure-Python XML reader -- several times faster on the daily feed.
+            new_data = pd.read_excel(file_path, header=1, engine="calamine")
             cleaned_data = new_data.iloc[1:].dropna(how="all").copy()
 
-            # --- NEW: Sanitize Column Names ---
+            # --- NEW: Sanitize + Rename Column Names ---
             # Replace newlines and spaces with underscores, remove special chars, and convert to uppercase.
             # This makes column names database-friendly (e.g., "OWN\nTEAM" -> "OWN_TEAM").
-            cleaned_data.columns = (
-                cleaned_data.columns.str.replace("\n", "_")
-                .str.replace(" ", "_")
-                .str.replace(r"[^a-zA-Z0-9_]", "", regex=True)
-                .str.upper()
+            # RENAME_MAP is applied in the same pass, so the columns Index is built once.
+            sanitized_columns = (
+                player_feed.sanitize_column(column, HEADER_SEPARATOR_PATTERN)
+                for column in cleaned_data.columns
             )
-
-            # --- NEW: Drop and Rename Columns ---
-            # Define columns to drop and the renaming map
-            columns_to_drop = [
-                "FANDUEL",
-                "YAHOO",
-                "FOR_FANDUEL_FULL_ROSTER_CONTESTS",
-                "FOR_YAHOO_FULL_SLATE_CONTESTS",
-                "FANDUEL1",
-                "YAHOO1",
+            cleaned_data.columns = [
+                RENAME_MAP.get(column, column) for column in sanitized_columns
             ]
-            rename_map = {
-                "BIGDATABALL_DATASET": "SEASON_SEGMENT",
-                "OWN_TEAM": "TEAM",
-                "OPPONENT_TEAM": "OPPONENT",
-                "STARTER_YN": "STARTED",
-                "VENUE_RHN": "VENUE",
-                "USAGE_RATE": "USAGE",
-                "DAYS_REST__3SEASON_DEBUT_0_BACKTOBACK": "DAYS_REST",
-                "DRAFTKINGS": "DK_POSITION",
-                "FOR_DRAFTKINGS_CLASSIC_CONTESTS": "DK_SALARY",
-                "DRAFTKINGS1": "DK_POINTS",
-            }
 
             # Overwrite the original DATE column with a formatted version
             cleaned_data["DATE"] = pd.to_datetime(cleaned_data["DATE"]).dt.strftime(
                 "%Y-%m-%d"
             )
 
-            # Apply the renaming
-            cleaned_data.rename(columns=rename_map, inplace=True)
-
             # Drop the unwanted columns, using errors='ignore' in case a column doesn't exist
-            cleaned_data.drop(columns=columns_to_drop, inplace=True, errors="ignore")
+            cleaned_data.drop(columns=COLUMNS_TO_DROP, inplace=True, errors="ignore")
 
             # --- NEW: Standardize Player Names using Shared Mapping ---
             if "PLAYER" in cleaned_data.columns:
@@ -277,84 +265,14 @@ def main():
                     )
                 cleaned_data[c] = numeric.astype(int)
 
-            # --- 4b. De-duplicate Logs ---
-            # Create a unique key in both dataframes for comparison
-            cleaned_data["log_key"] = (
-                cleaned_data["PLAYER_ID"].astype(str) + "_" + cleaned_data["DATE"]
-            )
-
-            # Filter for rows that are not already in the database
-            truly_new_logs_df = cleaned_data[
-                ~cleaned_data["log_key"].isin(existing_log_keys)
-            ].drop(columns=["log_key"])
-
-            if truly_new_logs_df.empty:
-                print("No new game logs found in this file. Moving to archive.")
-            else:
-                # --- 4c. Learn New Players (from the original plan) ---
-                new_players_df = truly_new_logs_df[
-                    ["PLAYER_ID", "PLAYER"]
-                ].drop_duplicates(subset=["PLAYER_ID"])
-
-                existing_players_df = pd.read_sql(
-                    f'SELECT "PLAYER_ID" FROM {PLAYERS_TABLE_NAME}', engine
-                )
-                existing_ids = set(existing_players_df["PLAYER_ID"])
-
-                truly_new_players_df_for_dim = new_players_df.loc[
-                    ~new_players_df["PLAYER_ID"].isin(existing_ids)
-                ]
-
-                if not truly_new_players_df_for_dim.empty:
-                    print(
-                        f"Adding {len(truly_new_players_df_for_dim)} new players to {PLAYERS_TABLE_NAME}..."
-                    )
-                    truly_new_players_df_renamed = truly_new_players_df_for_dim.rename(
-                        columns={"PLAYER": "PLAYER_NAME"}
-                    )
-                    truly_new_players_df_renamed.to_sql(
-                        PLAYERS_TABLE_NAME, con=engine, if_exists="append", index=False
-                    )
-
-                # --- 4d. Load (to fantasy_logs) ---
-                print(
-                    f"Adding {len(truly_new_logs_df)} new game logs to {LOGS_TABLE_NAME}."
-                )
-                truly_new_logs_df.to_sql(
-                    LOGS_TABLE_NAME,
-                    con=engine,
-                    if_exists="append",
-                    index=False,
-                    dtype={
-                        c: Integer()
-                        for c in ("PLAYER_ID", "GAME_ID")
-                        if c in truly_new_logs_df.columns
-                    },
-                )
-                ensure_unique_index()  # idempotent; creates index on first run
-                # --- Crucial Update ---
-                # After adding new logs to the DB, we must also add their keys
-                # to our in-memory set to prevent them from being added again
-                # when processing the next (cumulative) file in the same run.
-                newly_added_keys = set(
-                    truly_new_logs_df["PLAYER_ID"].astype(str)
-                    + "_"
-                    + truly_new_logs_df["DATE"]
-                )
-                existing_log_keys.update(newly_added_keys)
-
-            # --- 4e. Move File on Success ---
-            destination_path = os.path.join(PROCESSED_FOLDER, file_name)
+            # --- 4b. Stage for Load (de-duplicated in SQL after the loop) ---
+            print(f"Staging {len(cleaned_data)} game logs from {file_name}.")
+            staged_frames.append(cleaned_data)
 
-            # Check if we are overwriting an existing file
-            is_overwrite = os.path.exists(destination_path)
-
-            # Use replace to overwrite if the file already exists in the archive
-            os.replace(file_path, destination_path)
-            print(f"Successfully processed and moved {file_name}.")
-            fantasy_logs_count += 1
-            if is_overwrite:
-                fantasy_logs_overwritten += 1
+            # --- 4c. Queue File Move (replayed after the load commits) ---
+            pending_moves.append(
+                (file_path, os.path.join(PROCESSED_FOLDER, file_name))
+            )
 
         except Exception as e:
             error_msg = f"ERROR processing {file_name}: {e}"
@@ -363,6 +281,38 @@ def main():
             pipeline_errors.append(error_msg)
             break
 
+    # --- 4d. De-duplicate and Load everything staged above in a single transaction ---
+    # Files processed before a failure are still loaded and archived, exactly as
+    # when each file was committed on its own.
+    if pending_moves:
+        try:
+            # Cumulative files repeat earlier rows; insert_new_logs keeps the first
+            # copy of each key.
+            staged_logs = pd.concat(staged_frames, ignore_index=True)
+            with engine.begin() as conn:
+                load_staged_logs(conn, staged_logs)
+            ensure_unique_index()  # idempotent; creates index on first run
+        except Exception as e:
+            error_msg = f"ERROR loading new fantasy logs: {e}"
+            print(f"\n*** {error_msg} ***")
+            print("No fantasy log files were moved.")
+            pipeline_errors.append(error_msg)
+            pending_moves = []
+
+    # --- 4e. Move Files on Success ---
+    for file_path, destination_path in pending_moves:
+        file_name = os.path.basename(file_path)
+
+        # Check if we are overwriting an existing file
+        is_overwrite = os.path.exists(destination_path)
+
+        # Use replace to overwrite if the file already exists in the archive
+        os.replace(file_path, destination_path)
+        print(f"Successfully processed and moved {file_name}.")
+        fantasy_logs_count += 1
+        if is_overwrite:
+            fantasy_logs_overwritten += 1
+
     print("\n--- All new files processed. ---")
 
     print("\n--- Ingestion Phase Complete ---")
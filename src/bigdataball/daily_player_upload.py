@@ -8,11 +8,17 @@
 # 6. Archive processed files and run summary generation
 import pandas as pd
 from sqlalchemy import create_engine, text
+from concurrent.futures import ProcessPoolExecutor
+import collections
+import contextlib
 import glob
+import itertools
 import os
 from . import absence_ingestion
+from . import db_utils
 from . import mappings
 from . import paths
+from . import player_feed
 
 # --- 1. Configuration ---
 BASE_DATA_PATH = paths.resolve_base_data_path()
@@ -28,7 +34,11 @@ os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 # Database Configuration
 LOGS_TABLE_NAME = "player_logs"
 PLAYERS_TABLE_NAME = "dim_players"
-engine = create_engine(f"sqlite:///{DB_PATH}")
+# Scratch table each file's cleaned rows are loaded into before the dedup INSERT;
+# created and dropped inside that file's load transaction.
+STAGE_TABLE_NAME = "_stage_player_logs"
+
+engine = db_utils.tune_engine(create_engine(f"sqlite:///{DB_PATH}"))
 
 
 def ensure_unique_index():
@@ -55,21 +65,54 @@ def ensure_unique_index():
 
 def initialize_database():
     """Creates the dim_players table if it doesn't exist."""
-    with engine.connect() as conn:
-        conn.execute(
-            text(
-                f"""
-            CREATE TABLE IF NOT EXISTS {PLAYERS_TABLE_NAME} (
-                "PLAYER_ID" INTEGER PRIMARY KEY,
-                "PLAYER_NAME" TEXT
-            );
-            """
-            )
-        )
-        # Also ensure the main logs table exists
-        conn.commit()
+    with engine.begin() as conn:
+        db_utils.create_players_table(conn)
+    ensure_unique_index()
+
+
+def load_staged_logs(staged_logs):
+    """
+    Inserts the rows of `staged_logs` whose (PLAYER_ID, DATE) is not yet in
+    player_logs in one transaction, and learns any PLAYER_IDs missing from
+    dim_players (see db_utils.insert_new_logs). Returns the number of new logs.
+    """
+    # Creates player_logs on the first run (a no-op once it exists), so the unique
+    # index is in place before anything is inserted.
+    staged_logs.head(0).to_sql(
+        LOGS_TABLE_NAME, con=engine, if_exists="append", index=False
+    )
     ensure_unique_index()
 
+    with engine.begin() as conn:
+        new_logs, new_players = db_utils.insert_new_logs(
+            conn, LOGS_TABLE_NAME, STAGE_TABLE_NAME, staged_logs
+        )
+
+    if new_players:
+        print(f"Added {new_players} new players to {PLAYERS_TABLE_NAME}.")
+    return new_logs
+
+
+def parse_in_order(executor, files, window):
+    """
+    Yields player_feed.parse_player_log(file) for each of `files`, in order, with at
+    most `window` parses submitted to `executor` ahead of the one being consumed.
+    Bounding the look-ahead keeps only a few parsed DataFrames in memory at a time
+    instead of one per file waiting for its turn to load.
+    """
+    files = iter(files)
+    pending = collections.deque(
+        executor.submit(player_feed.parse_player_log, file_path)
+        for file_path in itertools.islice(files, window)
+    )
+    while pending:
+        future = pending.popleft()
+        # Top the window back up before waiting, so the workers stay busy while
+        # this file is loaded.
+        for file_path in itertools.islice(files, 1):
+            pending.append(executor.submit(player_feed.parse_player_log, file_path))
+        yield future.result()
+
 
 def main():
     """
@@ -78,35 +121,6 @@ def main():
     """
     initialize_database()
 
-    # --- Pre-load existing logs ---
-    # Try to load the logs that are already in the database.
-    # If the table doesn't exist (first run), create an empty DataFrame.
-    try:
-        existing_logs_df = pd.read_sql(
-            f'SELECT DISTINCT "PLAYER_ID", "DATE" FROM {LOGS_TABLE_NAME}', engine
-        )
-        if not existing_logs_df.empty:
-            print(f"Found {len(existing_logs_df)} existing logs in the database.")
-            # Create the log_key from the loaded data
-            existing_logs_df["log_key"] = (
-                existing_logs_df["PLAYER_ID"].astype(str)
-                + "_"
-                + pd.to_datetime(existing_logs_df["DATE"]).dt.strftime("%Y-%m-%d")
-            )
-        else:
-            # If the table exists but is empty, ensure the log_key column exists
-            existing_logs_df["log_key"] = pd.Series(dtype="str")
-
-    except Exception as e:
-        if "no such table" in str(e):
-            print(f"First run: `{LOGS_TABLE_NAME}` table not found. Will create it.")
-            # Create an empty DataFrame with all necessary columns
-            existing_logs_df = pd.DataFrame(columns=["PLAYER_ID", "DATE", "log_key"])
-        else:
-            # For any other database error, stop the script.
-            print(f"A database error occurred: {e}")
-            raise e
-
     # Sort the files to process them in chronological order, which is good practice.
     files_to_process = sorted(glob.glob(os.path.join(NEW_FILES_FOLDER, "*.xlsx")))
 
@@ -116,186 +130,98 @@ def main():
 
     print(f"Found {len(files_to_process)} new file(s) to process...")
 
-    # Initialize ONCE before the loop so keys added per file accumulate across files
-    # processed in the same run (prevents re-inserting logs from an earlier file).
-    existing_log_keys = set(existing_logs_df["log_key"])
-
-    # Same "initialize once" pattern for the DNP-DND-NWT absence sheet's keys.
+    # Initialize ONCE before the loop so the DNP-DND-NWT absence sheet's keys
+    # accumulate across files processed in the same run.
     existing_absence_keys = absence_ingestion.load_existing_absence_keys(engine)
     absences_count = 0
 
     processed_count = 0
     overwritten_count = 0
-    for file_path in files_to_process:
-        file_name = os.path.basename(file_path)
-        print(f"--- Processing: {file_name} ---")
-
-        try:
-            # --- 4a. Extract & Transform ---
-            new_data = pd.read_excel(file_path)
-            # Since the header is on row 0, we don't need to skip any rows.
-            # We just drop any rows that are completely empty.
-            cleaned_data = new_data.dropna(how="all").copy()
-
-            # --- NEW: Sanitize Column Names ---
-            # Replace newlines and spaces with underscores, remove special chars, and convert to uppercase.
-            # This makes column names database-friendly (e.g., "OWN\nTEAM" -> "OWN_TEAM").
-            cleaned_data.columns = (
-                cleaned_data.columns.str.replace("\n", "_")
-                .str.replace("-", "_")  # Convert hyphens to underscores
-                .str.replace(" ", "_")
-                .str.replace(r"[^a-zA-Z0-9_]", "", regex=True)
-                .str.upper()
-            )
-
-            # --- Rename Columns ---
-            # Define columns renaming map
-
-            rename_map = {
-                "BIGDATABALL_DATASET": "SEASON_SEGMENT",
-                "GAME_ID": "GAME_ID",
-                "PLAYER_ID": "PLAYER_ID",  # No change needed
-                "PLAYER__FULL_NAME": "PLAYER",  # From debug output
-                "POSITION": "POSITION",
-                "OWN__TEAM": "TEAM",  # From debug output
-                "OPPONENT__TEAM": "OPPONENT",  # From debug output
-                "VENUE_RHN": "VENUE",  # From debug output
-                "STARTER_YN": "STARTED",
-                "MIN": "MINUTES",
-                "FG": "FG",
-                "FGA": "FGA",
-                "3P": "3P",  # From debug output
-                "3PA": "3PA",  # From debug output
-                "FT": "FT",
-                "FTA": "FTA",
-                "OR": "OREB",  # From debug output
-                "DR": "DREB",  # From debug output
-                "TOT": "TREB",  # From debug output
-                "A": "AST",  # From debug output
-                "PF": "PF",
-                "ST": "STL",  # From debug output
-                "TO": "TOV",  # From debug output
-                "BL": "BLK",  # From debug output
-                "PTS": "PTS",
-                "USAGE__RATE_": "USAGE",  # From debug output
-                "DAYS_REST": "DAYS_REST",
-            }
-
-            # Since the source column is 'DATE', we can format it directly after sanitization.
-            cleaned_data["DATE"] = pd.to_datetime(cleaned_data["DATE"]).dt.strftime(
-                "%Y-%m-%d"
-            )
-
-            # The debug print statement can now be removed.
-
-            # Apply the renaming using the map
-            cleaned_data.rename(columns=rename_map, inplace=True)
-
-            # --- NEW: Standardize Player Names ---
-            if "PLAYER" in cleaned_data.columns:
-                # Identify names that are about to be changed for visibility
-                changed_mask = cleaned_data["PLAYER"].isin(mappings.PLAYER_NAME_MAP)
-                if changed_mask.any():
-                    print(
-                        f"  > Standardizing names: {cleaned_data.loc[changed_mask, 'PLAYER'].unique().tolist()}"
+    with contextlib.ExitStack() as stack:
+        # Parse the workbooks concurrently in worker processes -- the Excel parse is
+        # CPU-bound and independent per file. Loading below stays sequential and in
+        # file order: SQLite has a single writer, and each file's absences need its
+        # box scores loaded first. A lone file is parsed in-process instead of paying
+        # for worker start-up. Results come back in order, so a failed parse still
+        # stops the run at that file, after every earlier file has been loaded.
+        # Under the spawn start method (Windows) each worker re-imports the parent's
+        # __main__ as __mp_main__, so running this module with -m, or through
+        # daily_fantasy_log_upload, re-runs the upload modules' top level -- the
+        # makedirs and the engine set-up -- in every worker. That is accepted: both
+        # are idempotent and create_engine opens no connection until first use, which
+        # a worker never reaches; the workers only call player_feed.parse_player_log.
+        if len(files_to_process) > 1:
+            max_workers = min(len(files_to_process), os.cpu_count() or 1)
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+            # Don't wait on parses for files after a failure; they won't be loaded.
+            stack.callback(executor.shutdown, cancel_futures=True)
+            parsed_files = parse_in_order(executor, files_to_process, max_workers)
+        else:
+            parsed_files = map(player_feed.parse_player_log, files_to_process)
+
+        for file_path in files_to_process:
+            file_name = os.path.basename(file_path)
+            print(f"--- Processing: {file_name} ---")
+
+            try:
+                cleaned_data = next(parsed_files)
+
+                # --- NEW: Standardize Player Names ---
+                if "PLAYER" in cleaned_data.columns:
+                    # Identify names that are about to be changed for visibility
+                    changed_mask = cleaned_data["PLAYER"].isin(mappings.PLAYER_NAME_MAP)
+                    if changed_mask.any():
+                        print(
+                            f"  > Standardizing names: {cleaned_data.loc[changed_mask, 'PLAYER'].unique().tolist()}"
+                        )
+                    cleaned_data["PLAYER"] = cleaned_data["PLAYER"].replace(
+                        mappings.PLAYER_NAME_MAP
                     )
-                cleaned_data["PLAYER"] = cleaned_data["PLAYER"].replace(
-                    mappings.PLAYER_NAME_MAP
-                )
-
-            # --- End of new transformation section ---
 
-            # --- 4b. De-duplicate Logs ---
-            # Create a unique key in both dataframes for comparison
-            cleaned_data["log_key"] = (
-                cleaned_data["PLAYER_ID"].astype(str) + "_" + cleaned_data["DATE"]
-            )
-
-            # Filter for rows that are not already in the database
-            truly_new_logs_df = cleaned_data[
-                ~cleaned_data["log_key"].isin(existing_log_keys)
-            ].drop(columns=["log_key"])
-
-            if truly_new_logs_df.empty:
-                print("No new game logs found in this file. Moving to archive.")
-            else:
-                # --- 4c. Learn New Players (from the original plan) ---
-                new_players_df = truly_new_logs_df[
-                    ["PLAYER_ID", "PLAYER"]
-                ].drop_duplicates(subset=["PLAYER_ID"])
-
-                existing_players_df = pd.read_sql(
-                    f'SELECT "PLAYER_ID" FROM {PLAYERS_TABLE_NAME}', engine
+                # --- End of new transformation section ---
+
+                # --- 4b. Load (to player_logs), de-duplicated in SQL ---
+                # Logs already in the table (including those loaded from an earlier,
+                # cumulative file in this run) are skipped by the NOT EXISTS anti-join.
+                new_logs = load_staged_logs(cleaned_data)
+                if new_logs:
+                    print(f"Added {new_logs} new game logs to {LOGS_TABLE_NAME}.")
+                else:
+                    print("No new game logs found in this file. Moving to archive.")
+
+                # --- 4d.5 Ingest the DNP-DND-NWT absence sheet from the same file ---
+                # Must run after the box-score rows above are loaded (the conflict
+                # filter needs player_logs to reflect this file's box scores) and
+                # before the archive move below, so a failure here also stops the
+                # file from being archived.
+                inserted, sheet_found = absence_ingestion.ingest_absences(
+                    file_path, engine, existing_absence_keys
                 )
-                existing_ids = set(existing_players_df["PLAYER_ID"])
-
-                truly_new_players_df_for_dim = new_players_df.loc[
-                    ~new_players_df["PLAYER_ID"].isin(existing_ids)
-                ]
-
-                if not truly_new_players_df_for_dim.empty:
+                if not sheet_found:
                     print(
-                        f"Adding {len(truly_new_players_df_for_dim)} new players to {PLAYERS_TABLE_NAME}..."
+                        f"  > WARNING: no '{absence_ingestion.ABSENCE_SHEET_NAME}' sheet in {file_name}; skipping absences."
                     )
-                    truly_new_players_df_renamed = truly_new_players_df_for_dim.rename(
-                        columns={"PLAYER": "PLAYER_NAME"}
-                    )
-                    truly_new_players_df_renamed.to_sql(
-                        PLAYERS_TABLE_NAME, con=engine, if_exists="append", index=False
-                    )
-
-                # --- 4d. Load (to fantasy_logs) ---
-                print(
-                    f"Adding {len(truly_new_logs_df)} new game logs to {LOGS_TABLE_NAME}."
-                )
-                truly_new_logs_df.to_sql(
-                    LOGS_TABLE_NAME, con=engine, if_exists="append", index=False
-                )
-                ensure_unique_index()  # idempotent; creates index on first run
-                # --- Crucial Update ---
-                # After adding new logs to the DB, we must also add their keys
-                # to our in-memory set to prevent them from being added again
-                # when processing the next (cumulative) file in the same run.
-                newly_added_keys = set(
-                    truly_new_logs_df["PLAYER_ID"].astype(str)
-                    + "_"
-                    + truly_new_logs_df["DATE"]
-                )
-                existing_log_keys.update(newly_added_keys)
-
-            # --- 4d.5 Ingest the DNP-DND-NWT absence sheet from the same file ---
-            # Must run after the box-score rows above are loaded (the conflict
-            # filter needs player_logs to reflect this file's box scores) and
-            # before the archive move below, so a failure here also stops the
-            # file from being archived.
-            inserted, sheet_found = absence_ingestion.ingest_absences(
-                file_path, engine, existing_absence_keys
-            )
-            if not sheet_found:
-                print(
-                    f"  > WARNING: no '{absence_ingestion.ABSENCE_SHEET_NAME}' sheet in {file_name}; skipping absences."
-                )
-            else:
-                print(f"  > Added {inserted} new absence rows to player_absences.")
-            absences_count += inserted
-
-            # --- 4e. Move File on Success ---
-            destination_path = os.path.join(PROCESSED_FOLDER, file_name)
-
-            # Check if we are overwriting an existing file
-            is_overwrite = os.path.exists(destination_path)
-
-            # Use replace to overwrite if the file already exists in the archive
-            os.replace(file_path, destination_path)
-            print(f"Successfully processed and moved {file_name}.")
-            processed_count += 1
-            if is_overwrite:
-                overwritten_count += 1
-
-        except Exception as e:
-            print(f"\n*** ERROR processing {file_name}: {e} ***")
-            print("Script will stop. The failed file was NOT moved.")
-            break
+                else:
+                    print(f"  > Added {inserted} new absence rows to player_absences.")
+                absences_count += inserted
+
+                # --- 4e. Move File on Success ---
+                destination_path = os.path.join(PROCESSED_FOLDER, file_name)
+
+                # Check if we are overwriting an existing file
+                is_overwrite = os.path.exists(destination_path)
+
+                # Use replace to overwrite if the file already exists in the archive
+                os.replace(file_path, destination_path)
+                print(f"Successfully processed and moved {file_name}.")
+                processed_count += 1
+                if is_overwrite:
+                    overwritten_count += 1
+
+            except Exception as e:
+                print(f"\n*** ERROR processing {file_name}: {e} ***")
+                print("Script will stop. The failed file was NOT moved.")
+                break
 
     print("\n--- All new files processed. ---")
 
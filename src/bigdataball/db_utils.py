@@ -0,0 +1,108 @@
+# db_utils.py
+# Shared SQLite connection tuning and dim_players helpers for the pipeline scripts.
+# journal_mode is deliberately never changed here: WAL is persistent in the DB file
+# and breaks read-only consumers' ATTACH (see docs/nba-fantasy-logs-db-reference.md),
+# and synchronous is left at its default so the rollback journal stays crash-safe.
+from sqlalchemy import event
+
+# Default per-connection PRAGMAs: in-memory temp B-trees (sorts, GROUP BY, staging),
+# a 64 MB page cache, up to 256 MB of memory-mapped reads, and a 60 s wait on a lock
+# held by another connection instead of failing immediately with "database is locked".
+CONNECTION_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=60000",
+)
+
+# Rows per multi-row INSERT when staging; keeps (rows x columns) under SQLite's
+# bound-parameter limit.
+INSERT_CHUNKSIZE = 500
+
+
+def apply_pragmas(dbapi_connection, pragmas=CONNECTION_PRAGMAS):
+    """Runs each PRAGMA in `pragmas` on a raw DBAPI (sqlite3) connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def tune_engine(engine, pragmas=CONNECTION_PRAGMAS):
+    """Applies `pragmas` to every new connection `engine` opens. Returns `engine`."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def create_players_table(conn):
+    """Creates dim_players on SQLAlchemy connection `conn` if it doesn't exist.
+    The one definition of its schema, shared by every ingest path that learns players."""
+    conn.exec_driver_sql(
+        """
+        CREATE TABLE IF NOT EXISTS dim_players (
+            "PLAYER_ID" INTEGER PRIMARY KEY,
+            "PLAYER_NAME" TEXT
+        )
+        """
+    )
+
+
+def learn_players(conn, source):
+    """Adds each PLAYER_ID in table `source` that dim_players lacks, under the name
+    on its first `source` row. `source` needs "PLAYER_ID" and "PLAYER" columns.
+    Returns the number of players added."""
+    # NOT EXISTS rather than ON CONFLICT: a dim_players created by an older to_sql
+    # append has no PRIMARY KEY for ON CONFLICT to target.
+    return conn.exec_driver_sql(
+        f"""
+        INSERT INTO dim_players ("PLAYER_ID", "PLAYER_NAME")
+        SELECT s."PLAYER_ID", s."PLAYER" FROM {source} s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM {source} GROUP BY "PLAYER_ID")
+          AND NOT EXISTS (
+            SELECT 1 FROM dim_players d WHERE d."PLAYER_ID" = s."PLAYER_ID"
+        )
+        """
+    ).rowcount
+
+
+def insert_new_logs(conn, logs_table, stage_table, staged_logs, dtype=None):
+    """Inserts the rows of `staged_logs` whose (PLAYER_ID, DATE) `logs_table` does not
+    hold yet, and learns their unseen players into dim_players, all on `conn`.
+    `logs_table` must already exist. The rows go through scratch table `stage_table`
+    (replaced, then dropped) so SQLite performs the anti-join against the
+    (PLAYER_ID, DATE) index instead of pre-loading every existing key into Python.
+    Returns (new_logs, new_players)."""
+    # A log repeated within the batch would pass the anti-join twice; keep the first.
+    staged_logs = staged_logs.drop_duplicates(subset=["PLAYER_ID", "DATE"])
+    staged_logs.to_sql(
+        stage_table,
+        con=conn,
+        if_exists="replace",
+        index=False,
+        method="multi",
+        chunksize=INSERT_CHUNKSIZE,
+        dtype=dtype,
+    )
+
+    columns = ", ".join(f'"{c}"' for c in staged_logs.columns)
+    # DATE is matched as a prefix range rather than by equality so a legacy row
+    # stored with a time component ("2025-11-01 00:00:00") still counts as present,
+    # while the lookup remains a seek on the ("PLAYER_ID", "DATE") index.
+    new_logs = conn.exec_driver_sql(
+        f"""
+        INSERT INTO {logs_table} ({columns})
+        SELECT {columns} FROM {stage_table} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {logs_table} t
+            WHERE t."PLAYER_ID" = s."PLAYER_ID"
+              AND t."DATE" >= s."DATE" AND t."DATE" < s."DATE" || '~'
+        )
+        """
+    ).rowcount
+    new_players = learn_players(conn, stage_table)
+    conn.exec_driver_sql(f"DROP TABLE {stage_table}")
+    return new_logs, new_players
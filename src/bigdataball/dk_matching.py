@@ -1,11 +1,38 @@
+import itertools
 import os
 
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
 from . import mappings
-from thefuzz import process
 
 DK_FILENAME = "DKEntries.csv"
 MATCH_THRESHOLD = 90
 
+# Latin-1 code points dropped before scoring (thefuzz's force_ascii behaviour).
+_LATIN1_NON_ASCII = {i: None for i in range(128, 256)}
+
+# In-process cache, so a run that exports the slate CSV and then rebuilds the slate
+# views parses DKEntries.csv once; keyed on the file's (mtime, size).
+_DK_NAMES_CACHE = {}
+
+
+def _file_stamp(path):
+    """(mtime_ns, size) of `path`; changes whenever the file is rewritten."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _process_choice(name):
+    """thefuzz's WRatio preprocessing: drop Latin-1 non-ASCII characters, then
+    lowercase, replace non-alphanumerics with spaces and trim."""
+    return default_process(name.translate(_LATIN1_NON_ASCII))
+
+
+def _process_query(name):
+    """thefuzz's extractOne also runs its default processor over the query first."""
+    return _process_choice(default_process(name))
+
 
 def find_dk_file_path():
     """Path to DKEntries.csv in the user's Downloads folder."""
@@ -25,22 +52,31 @@ def load_dk_names(dk_file_path):
         print(f"ERROR: Could not find file at {dk_file_path}")
         return None
 
+    stamp = _file_stamp(dk_file_path)
+    cached = _DK_NAMES_CACHE.get(dk_file_path)
+    if cached is not None and cached[0] == stamp:
+        print(f"Reusing parsed file: {dk_file_path}")
+        return list(cached[1])
+
     print(f"Reading file: {dk_file_path}")
     header_row_index = 0
     try:
+        # Stream only the first 50 lines; the rest of the file (lineup rows) is left
+        # for pd.read_csv rather than being read into memory twice.
         with open(dk_file_path, "r", encoding="utf-8-sig") as f:
-            lines = f.readlines()
-        for i, line in enumerate(lines[:50]):
-            if "Position" in line and "Name + ID" in line:
-                header_row_index = i
-                break
+            for i, line in enumerate(itertools.islice(f, 50)):
+                if "Position" in line and "Name + ID" in line:
+                    header_row_index = i
+                    break
 
         dk_df = pd.read_csv(dk_file_path, header=header_row_index, encoding="utf-8-sig")
         if "Name" not in dk_df.columns:
             print("ERROR: Could not find 'Name' column.")
             return None
         dk_df = dk_df.dropna(subset=["Name"])
-        return dk_df["Name"].unique().tolist()
+        dk_names = dk_df["Name"].unique().tolist()
+        _DK_NAMES_CACHE[dk_file_path] = (stamp, dk_names)
+        return list(dk_names)
     except Exception as e:
         print(f"ERROR: Failed to read or parse DK file: {e}")
         return None
@@ -58,7 +94,7 @@ def match_names(dk_names, valid_db_names, threshold=MATCH_THRESHOLD):
     dk_names = [str(n).strip() for n in dk_names if n is not None and str(n).strip()]
     # Strip None/NaN/non-string values that can appear when the DB view has NULL rows.
     valid_db_names = [n.strip() for n in valid_db_names if isinstance(n, str) and n.strip()]
-    # Guard: process.extractOne raises on an empty choice list. If the DB/view returned
+    # Guard: there is no best match in an empty choice list. If the DB/view returned
     # no players (a fresh DB, or an out-of-season playoffs view), treat every DK name as
     # unmatched rather than crashing the pipeline. This is a deliberate robustness
     # improvement over the original inline code (which would crash here).
@@ -68,10 +104,23 @@ def match_names(dk_names, valid_db_names, threshold=MATCH_THRESHOLD):
             for n in dk_names
         ]
         return [], unmatched
-    for dk_name in dk_names:
-        if dk_name in mappings.PLAYER_NAME_MAP:
-            dk_name = mappings.PLAYER_NAME_MAP[dk_name]
-        match, score = process.extractOne(dk_name, valid_db_names)
+    if not dk_names:
+        return [], []
+    dk_names = [mappings.PLAYER_NAME_MAP.get(n, n) for n in dk_names]
+    # Score every DK name against every DB name in one WRatio matrix (C++, all
+    # cores) instead of one extractOne scan per DK name. The preprocessing and
+    # first-best tie-breaking reproduce thefuzz.process.extractOne exactly.
+    scores = process.cdist(
+        [_process_query(n) for n in dk_names],
+        [_process_choice(n) for n in valid_db_names],
+        scorer=fuzz.WRatio,
+        dtype="float64",
+        workers=-1,
+    )
+    best_indexes = scores.argmax(axis=1)
+    for dk_name, row, best_index in zip(dk_names, scores, best_indexes):
+        match = valid_db_names[best_index]
+        score = int(round(row[best_index]))
         if score >= threshold:
             matched.append(match)
         else:
@@ -79,6 +128,38 @@ def match_names(dk_names, valid_db_names, threshold=MATCH_THRESHOLD):
     return list(set(matched)), unmatched
 
 
+def load_valid_db_names(engine, view_name):
+    """Distinct PLAYER values from `view_name`."""
+    import pandas as pd  # deferred: callers of match_names/to_sql_in_list don't need it
+
+    db_players_df = pd.read_sql_query(f"SELECT DISTINCT PLAYER FROM {view_name}", engine)
+    return db_players_df["PLAYER"].tolist()
+
+
+def resolve_slate(engine, view_name, dk_names):
+    """Match DK names against `view_name`'s players and print the unmatched warning.
+
+    Returns (final_names_to_query, unmatched_names) as match_names does.
+    """
+    print("Fetching valid player list from database...")
+    valid_db_names = load_valid_db_names(engine, view_name)
+
+    print("Matching names...")
+    final_names_to_query, unmatched_names = match_names(dk_names, valid_db_names)
+
+    if unmatched_names:
+        print(
+            f"\n--- WARNING: {len(unmatched_names)} players in DKEntries could not be matched to database ---"
+        )
+        for name in unmatched_names:
+            print(f"   x {name}")
+        print(
+            "----------------------------------------------------------------------------------------------\n"
+        )
+
+    return final_names_to_query, unmatched_names
+
+
 def to_sql_in_list(names):
     """Single-quote-escape and join names for a SQL IN (...) clause."""
     if not names:
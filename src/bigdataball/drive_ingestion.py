@@ -1,21 +1,25 @@
 import io
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 import googleapiclient.discovery
 from googleapiclient.http import MediaIoBaseDownload
 from .auth_manager import authenticate_google_drive
 from . import config
 
 
-def get_drive_service():
-    """Builds the Drive API service using our custom auth manager."""
-    creds = authenticate_google_drive()
+def get_drive_service(creds=None):
+    """Builds the Drive API service using our custom auth manager.
+    Pass `creds` to reuse credentials that have already been authenticated."""
+    if creds is None:
+        creds = authenticate_google_drive()
     return googleapiclient.discovery.build("drive", "v3", credentials=creds)
 
 
 def find_latest_file(service, folder_id, file_match):
     """
     Queries Google Drive for files in a specific folder matching a name pattern.
-    Returns the file metadata for the alphabetically last (latest) file.
+    Returns the file metadata for the most recently created (latest) file.
     """
     query = (
         f"'{folder_id}' in parents and name contains '{file_match}' and trashed = false"
@@ -26,7 +30,10 @@ def find_latest_file(service, folder_id, file_match):
         service.files()
         .list(
             q=query,
-            orderBy="createdTime",  # Sort by creation time to handle date rollovers (e.g. 12-31 vs 01-01)
+            # Newest first, by creation time rather than name to handle date
+            # rollovers (e.g. 12-31 vs 01-01); only that one file is returned.
+            orderBy="createdTime desc",
+            pageSize=1,
             fields="files(id, name, createdTime)",
             supportsAllDrives=True,
             includeItemsFromAllDrives=True,
@@ -39,10 +46,7 @@ def find_latest_file(service, folder_id, file_match):
     if not items:
         return None
 
-    # Python sort to ensure we get the last one chronologically (Latest)
-    # ISO timestamps (createdTime) sort correctly as strings
-    latest_file = sorted(items, key=lambda x: x["createdTime"])[-1]
-    return latest_file
+    return items[0]
 
 
 def download_file(service, file_id, file_name, local_dest):
@@ -61,38 +65,62 @@ def download_file(service, file_id, file_name, local_dest):
 
     print(f"  [Downloading] {file_name}...")
     request = service.files().get_media(fileId=file_id)
-    fh = io.FileIO(file_path, "wb")
-    downloader = MediaIoBaseDownload(fh, request)
+    with io.FileIO(file_path, "wb") as fh:
+        downloader = MediaIoBaseDownload(fh, request)
 
-    done = False
-    while done is False:
-        status, done = downloader.next_chunk()
-        # Optional: Print progress if needed
-        # print(f"Download {int(status.progress() * 100)}%.")
+        done = False
+        while done is False:
+            status, done = downloader.next_chunk()
+            # Optional: Print progress if needed
+            # print(f"Download {int(status.progress() * 100)}%.")
 
     print(f"  [Success] Saved to {file_path}")
 
 
-def main():
-    print("--- Starting NBA Data Ingestion ---")
+def process_job(job, creds_info):
+    """Finds and downloads the latest file for one DATASET_JOBS entry.
+    Builds its own credentials (from `creds_info`, the authorized-user dict) and
+    service: a Credentials object refreshes itself in place and the underlying
+    httplib2 connection is not thread-safe, so neither is shared across threads."""
+    # deferred, as in auth_manager: the google-auth stack is slow to import
+    from google.oauth2.credentials import Credentials
 
-    # We removed the try/except block here so errors bubble up to the main pipeline
-    service = get_drive_service()
+    creds = Credentials.from_authorized_user_info(creds_info, config.SCOPES)
+    service = get_drive_service(creds)
+    print(f"\nProcessing Job: {job['name']}")
 
-    for job in config.DATASET_JOBS:
-        print(f"\nProcessing Job: {job['name']}")
+    latest_file = find_latest_file(service, job["drive_folder_id"], job["file_match"])
 
-        latest_file = find_latest_file(
-            service, job["drive_folder_id"], job["file_match"]
+    if latest_file:
+        print(f"  [{job['name']}] Found latest file: {latest_file['name']}")
+        download_file(
+            service, latest_file["id"], latest_file["name"], job["local_dest"]
         )
+    else:
+        print(f"  [{job['name']}] No files found matching '{job['file_match']}' in folder.")
+
+
+def main():
+    print("--- Starting NBA Data Ingestion ---")
 
-        if latest_file:
-            print(f"  Found latest file: {latest_file['name']}")
-            download_file(
-                service, latest_file["id"], latest_file["name"], job["local_dest"]
-            )
-        else:
-            print(f"  No files found matching '{job['file_match']}' in folder.")
+    if not config.DATASET_JOBS:
+        print("No dataset jobs configured.")
+        return
+
+    # Authenticate (and refresh if needed) once up front -- this may open a
+    # browser -- so every job thread starts from the same valid token.
+    creds = authenticate_google_drive()
+    creds_info = json.loads(creds.to_json())
+
+    # The jobs download independent files, so run them concurrently.
+    # We removed the try/except block here so errors bubble up to the main pipeline:
+    # result() re-raises a job's exception, checked in DATASET_JOBS order.
+    with ThreadPoolExecutor(max_workers=len(config.DATASET_JOBS)) as executor:
+        futures = [
+            executor.submit(process_job, job, creds_info) for job in config.DATASET_JOBS
+        ]
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
@@ -4,18 +4,34 @@
 # 2. Extract player names from the DraftKings file by robustly finding the correct header row
 # 3. Connect to the SQLite database (nba_fantasy_logs.db)
 # 4. Fetch the master list of valid player names from 'vw_player_averages_regular_season'
-# 5. Use fuzzy matching (thefuzz) to map DraftKings names to Database names to handle spelling differences
+# 5. Use fuzzy matching (RapidFuzz) to map DraftKings names to Database names to handle spelling differences
 # 6. Query the database for stats specific to the identified players
 # 7. Export the results to a timestamped CSV in the 'csv_exports' folder
 
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import os
 from datetime import datetime
+from . import db_utils
 from . import dk_matching
 from . import paths
 from . import seasons
 
+# Connection-scoped TEMP table holding the matched slate names; the export query
+# semi-joins against it instead of inlining hundreds of quoted literals.
+SLATE_NAMES_TABLE = "tmp_slate_names"
+
+
+def stage_slate_names(conn, names):
+    """(Re)creates SLATE_NAMES_TABLE on `conn` and fills it with `names` as bound parameters."""
+    conn.execute(text(f"DROP TABLE IF EXISTS temp.{SLATE_NAMES_TABLE}"))
+    conn.execute(text(f"CREATE TEMP TABLE {SLATE_NAMES_TABLE} (PLAYER TEXT PRIMARY KEY)"))
+    if names:
+        conn.execute(
+            text(f"INSERT OR IGNORE INTO {SLATE_NAMES_TABLE} (PLAYER) VALUES (:player)"),
+            [{"player": name} for name in names],
+        )
+
 
 def run_slate_averages_smart_export():
     print("--- Starting Smart Slate Averages Export ---")
@@ -36,51 +52,42 @@ def run_slate_averages_smart_export():
 
     try:
         # --- 3. Fetch VALID names from Database ---
-        engine = create_engine(f"sqlite:///{DB_PATH}")
-
-        print("Fetching valid player list from database...")
-        db_players_query = (
-            "SELECT DISTINCT PLAYER FROM vw_player_averages_regular_season"
-        )
-        db_players_df = pd.read_sql_query(db_players_query, engine)
-        valid_db_names = db_players_df["PLAYER"].tolist()
+        engine = db_utils.tune_engine(create_engine(f"sqlite:///{DB_PATH}"))
 
         # --- 4. Fuzzy Match Logic ---
-        print("Matching names...")
-        final_names_to_query, unmatched_names = dk_matching.match_names(
-            dk_names, valid_db_names
+        final_names_to_query, unmatched_names = dk_matching.resolve_slate(
+            engine, "vw_player_averages_regular_season", dk_names
         )
 
-        if unmatched_names:
-            print(
-                f"\n--- WARNING: {len(unmatched_names)} players in DKEntries could not be matched to database ---"
-            )
-            for name in unmatched_names:
-                print(f"   x {name}")
-            print(
-                "----------------------------------------------------------------------------------------------\n"
-            )
-
         print(
             f"Identified {len(final_names_to_query)} valid database players to query."
         )
 
         # --- 5. Construct & Run Final Query ---
-        sql_names_string = dk_matching.to_sql_in_list(final_names_to_query)
-
-        query = f"""
-        SELECT 
-            SEASON, PLAYER, TEAM, GP, GS, MPG, GSMPG, FPPG, GSFPPG, FPPM, GSFPPM, STDV_FPPG as STDV
-        FROM 
-            vw_player_averages_regular_season
-        WHERE 
-            SEASON in ({seasons.slate_seasons_sql()})
-            AND PLAYER IN ('{sql_names_string}')
-        ORDER BY 
-            TEAM, PLAYER, SEASON DESC;
-        """
-
-        results_df = pd.read_sql_query(query, engine)
+        # Staging and query share one connection so the query sees its TEMP table.
+        with engine.connect() as conn:
+            stage_slate_names(conn, final_names_to_query)
+
+            # One scan of the view serves both CSVs: the slate seasons plus the L30
+            # season, with L30FPPM, split into the two exports in pandas below.
+            query = f"""
+            SELECT 
+                SEASON, PLAYER, TEAM, GP, GS, MPG, GSMPG, FPPG, GSFPPG, FPPM, GSFPPM, STDV_FPPG as STDV,
+                L30FPPM
+            FROM 
+                vw_player_averages_regular_season
+            WHERE 
+                SEASON in ({seasons.slate_seasons_sql()}, '{seasons.L30_SEASON}')
+                AND PLAYER IN (SELECT PLAYER FROM {SLATE_NAMES_TABLE})
+            ORDER BY 
+                TEAM, PLAYER, SEASON DESC;
+            """
+
+            all_results_df = pd.read_sql_query(query, conn)
+
+        results_df = all_results_df.loc[
+            all_results_df["SEASON"].isin(seasons.SLATE_SEASONS)
+        ].drop(columns="L30FPPM")
 
         timestamp = datetime.now().strftime("%m-%d-%Y_%H%M%S")
         export_filename = f"slate_player_averages_{timestamp}.csv"
@@ -92,30 +99,10 @@ def run_slate_averages_smart_export():
 
         # --- 6. Create and Export the L30 CSV ---
         print("\n--- Creating L30 Slate Averages Export ---")
-        query_l30 = f"""
-        SELECT
-            SEASON,
-            PLAYER,
-            TEAM,
-            GP,
-            GS,
-            MPG,
-            GSMPG,
-            FPPG,
-            GSFPPG,
-            FPPM,
-            GSFPPM,
-            STDV_FPPG as STDV,
-            L30FPPM
-        FROM
-            vw_player_averages_regular_season
-        WHERE
-            SEASON = '{seasons.L30_SEASON}'
-            AND PLAYER IN ('{sql_names_string}')
-        ORDER BY
-            TEAM, PLAYER
-        """
-        results_l30_df = pd.read_sql_query(query_l30, engine)
+        # A single season, so the TEAM, PLAYER, SEASON DESC order is TEAM, PLAYER.
+        results_l30_df = all_results_df.loc[
+            all_results_df["SEASON"] == seasons.L30_SEASON
+        ]
         export_l30_filename = f"slate_player_averages_l30_{timestamp}.csv"
         export_l30_path = os.path.join(CSV_EXPORT_DIR, export_l30_filename)
         results_l30_df.to_csv(export_l30_path, index=False)
@@ -5,9 +5,9 @@
 # 3. Dynamically CREATE A SQL VIEW (vw_daily_slate) restricted to these players
 # 4. This View can then be queried by Excel or other tools directly
 
-import pandas as pd
 from sqlalchemy import create_engine, text
 import os
+from . import db_utils
 from . import dk_matching
 from . import paths
 from . import seasons
@@ -33,31 +33,13 @@ def run_slate_averages_pipeline():
     unmatched_names = []
     try:
         # --- 3. Fetch VALID names from Database ---
-        engine = create_engine(f"sqlite:///{DB_PATH}")
-
-        print("Fetching valid player list from database...")
-        db_players_query = (
-            "SELECT DISTINCT PLAYER FROM vw_player_averages_regular_season"
-        )
-        db_players_df = pd.read_sql_query(db_players_query, engine)
-        valid_db_names = db_players_df["PLAYER"].tolist()
+        engine = db_utils.tune_engine(create_engine(f"sqlite:///{DB_PATH}"))
 
         # --- 4. Fuzzy Match Logic ---
-        print("Matching names...")
-        final_names_to_query, unmatched_names = dk_matching.match_names(
-            dk_names, valid_db_names
+        final_names_to_query, unmatched_names = dk_matching.resolve_slate(
+            engine, "vw_player_averages_regular_season", dk_names
         )
 
-        if unmatched_names:
-            print(
-                f"\n--- WARNING: {len(unmatched_names)} players in DKEntries could not be matched to database ---"
-            )
-            for name in unmatched_names:
-                print(f"   x {name}")
-            print(
-                "----------------------------------------------------------------------------------------------\n"
-            )
-
         print(f"Identified {len(final_names_to_query)} valid database players.")
 
         # --- 5. Create the View ---
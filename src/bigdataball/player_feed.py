@@ -0,0 +1,84 @@
+# player_feed.py
+# Parsing of the BigDataBall daily player-log workbook, kept free of import-time
+# side effects (no engine, no data-folder access): daily_player_upload parses files
+# in worker processes, and under the spawn start method (Windows) every worker
+# re-imports the module that defines the function it runs.
+import pandas as pd
+import re
+
+# Column-name sanitization: each newline/hyphen/space becomes "_", then anything
+# outside [A-Za-z0-9_] is stripped. One character at a time, never collapsed --
+# the rename map relies on the resulting double underscores (e.g. "OWN__TEAM").
+HEADER_SEPARATOR_PATTERN = re.compile(r"[\n\- ]")
+HEADER_INVALID_CHAR_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+
+# Sanitized feed header -> stored player_logs column. Applied in the same pass as
+# sanitization; headers not listed here keep their sanitized name.
+RENAME_MAP = {
+    "BIGDATABALL_DATASET": "SEASON_SEGMENT",
+    "GAME_ID": "GAME_ID",
+    "PLAYER_ID": "PLAYER_ID",  # No change needed
+    "PLAYER__FULL_NAME": "PLAYER",  # From debug output
+    "POSITION": "POSITION",
+    "OWN__TEAM": "TEAM",  # From debug output
+    "OPPONENT__TEAM": "OPPONENT",  # From debug output
+    "VENUE_RHN": "VENUE",  # From debug output
+    "STARTER_YN": "STARTED",
+    "MIN": "MINUTES",
+    "FG": "FG",
+    "FGA": "FGA",
+    "3P": "3P",  # From debug output
+    "3PA": "3PA",  # From debug output
+    "FT": "FT",
+    "FTA": "FTA",
+    "OR": "OREB",  # From debug output
+    "DR": "DREB",  # From debug output
+    "TOT": "TREB",  # From debug output
+    "A": "AST",  # From debug output
+    "PF": "PF",
+    "ST": "STL",  # From debug output
+    "TO": "TOV",  # From debug output
+    "BL": "BLK",  # From debug output
+    "PTS": "PTS",
+    "USAGE__RATE_": "USAGE",  # From debug output
+    "DAYS_REST": "DAYS_REST",
+}
+
+
+def sanitize_column(column, separator_pattern=HEADER_SEPARATOR_PATTERN):
+    """Sanitizes one feed header: each `separator_pattern` match (by default
+    newlines/hyphens/spaces) -> underscore, strip anything non-alphanumeric/underscore,
+    upper. A numeric or blank (None) Excel header is taken as its str() first.
+    Shared with absence_ingestion and daily_fantasy_log_upload."""
+    return HEADER_INVALID_CHAR_PATTERN.sub(
+        "", separator_pattern.sub("_", str(column))
+    ).upper()
+
+
+def parse_player_log(file_path):
+    """
+    Reads one daily player-log workbook and returns its box-score rows with
+    sanitized, renamed columns and ISO dates. Runs in a worker process when
+    daily_player_upload.main() has several files to parse.
+    """
+    # --- 4a. Extract & Transform ---
+    # calamine parses the workbook natively instead of through openpyxl's
+    # pure-Python XML reader -- several times faster on the daily feed.
+    new_data = pd.read_excel(file_path, engine="calamine")
+    # Since the header is on row 0, we don't need to skip any rows.
+    # We just drop any rows that are completely empty.
+    cleaned_data = new_data.dropna(how="all").copy()
+
+    # --- NEW: Sanitize + Rename Column Names ---
+    # Replace newlines and spaces with underscores, remove special chars, and convert to uppercase.
+    # This makes column names database-friendly (e.g., "OWN\nTEAM" -> "OWN_TEAM").
+    # RENAME_MAP is applied in the same pass, so the columns Index is built once.
+    sanitized_columns = (sanitize_column(column) for column in cleaned_data.columns)
+    cleaned_data.columns = [RENAME_MAP.get(column, column) for column in sanitized_columns]
+
+    # Since the source column is 'DATE', we can format it directly after sanitization.
+    cleaned_data["DATE"] = pd.to_datetime(cleaned_data["DATE"]).dt.strftime(
+        "%Y-%m-%d"
+    )
+
+    return cleaned_data
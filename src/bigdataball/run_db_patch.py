@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from . import db_utils
 from . import mappings
 from . import paths
 
@@ -10,12 +11,27 @@ DB_PATH = os.path.join(BASE_DATA_PATH, "nba_fantasy_logs.db")
 
 
 def fix_player_names():
+    name_map = mappings.PLAYER_NAME_MAP
+    if not name_map:
+        # Nothing to apply -- and "IN ()" would not even parse.
+        print("PLAYER_NAME_MAP is empty; no names to correct.")
+        return
+
+    # The single-pass CASE below applies each mapping once. That equals applying
+    # them one by one only if no canonical name is itself a variant (no chains).
+    chained = sorted(set(name_map.values()) & set(name_map))
+    if chained:
+        raise ValueError(
+            f"PLAYER_NAME_MAP has chained mappings (targets that are also variants): {chained}"
+        )
+
     if not os.path.exists(DB_PATH):
         print(f"Database not found at: {DB_PATH}")
         return
 
     # Connect to the database
     conn = sqlite3.connect(DB_PATH)
+    db_utils.apply_pragmas(conn)
     cursor = conn.cursor()
 
     # Define the tables and columns that may contain player names to be corrected.
@@ -31,34 +47,38 @@ def fix_player_names():
     print("Starting retroactive player name correction across all relevant tables...")
     total_updates = 0
 
-    for incorrect_name, correct_name in mappings.PLAYER_NAME_MAP.items():
-        print(f"\n--- Applying mapping: '{incorrect_name}' -> '{correct_name}' ---")
-
-        for table, column in tables_to_patch.items():
-            try:
-                # Check for records to update using parameter binding for safety
-                cursor.execute(
-                    f"SELECT COUNT(*) FROM {table} WHERE {column} = ?",
-                    (incorrect_name,),
-                )
-                count = cursor.fetchone()[0]
-
-                if count > 0:
-                    print(f"  > Found {count} record(s) in '{table}'. Updating...")
-                    # Execute the update
-                    cursor.execute(
-                        f"UPDATE {table} SET {column} = ? WHERE {column} = ?",
-                        (correct_name, incorrect_name),
-                    )
-                    total_updates += cursor.rowcount
-
-            except sqlite3.OperationalError as e:
-                # This handles cases where a table or column might not exist
-                if "no such table" in str(e) or "no such column" in str(e):
-                    print(f"  > Skipping '{table}': Table or column not found.")
-                else:
-                    # Re-raise other operational errors
-                    raise e
+    # Every mapping is applied to a table in ONE statement (one scan), with all
+    # names bound as parameters:
+    #   UPDATE t SET col = CASE col WHEN ? THEN ? ... ELSE col END WHERE col IN (?, ...)
+    # The chain check above makes this single pass equivalent to applying the
+    # mappings one by one.
+    for incorrect_name, correct_name in name_map.items():
+        print(f"  > Mapping: '{incorrect_name}' -> '{correct_name}'")
+    when_clauses = " ".join("WHEN ? THEN ?" for _ in name_map)
+    placeholders = ", ".join("?" for _ in name_map)
+    params = [name for pair in name_map.items() for name in pair] + list(name_map)
+
+    for table, column in tables_to_patch.items():
+        try:
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET {column} = CASE {column} {when_clauses} ELSE {column} END
+                WHERE {column} IN ({placeholders})
+                """,
+                params,
+            )
+            if cursor.rowcount > 0:
+                print(f"  > Updated {cursor.rowcount} record(s) in '{table}'.")
+            total_updates += cursor.rowcount
+
+        except sqlite3.OperationalError as e:
+            # This handles cases where a table or column might not exist
+            if "no such table" in str(e) or "no such column" in str(e):
+                print(f"  > Skipping '{table}': Table or column not found.")
+            else:
+                # Re-raise other operational errors
+                raise e
 
     print("\n--- Patch Summary ---")
     if total_updates > 0:
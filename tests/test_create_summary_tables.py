@@ -2,6 +2,7 @@
 import importlib
 import sqlite3
 import sys
+from pathlib import Path
 
 import pandas as pd
 import pytest
@@ -89,6 +90,31 @@ def test_basic_aggregation_creates_fantasy_averages(summary_tables):
     assert row["PLAYER"] == "Canonical Name"        # from dim_players, not fantasy_logs
 
 
+def test_duplicate_ids_in_legacy_dim_players_do_not_double_counts(summary_tables):
+    """A dim_players created without the PRIMARY KEY can repeat a PLAYER_ID; the
+    join must still see one name per ID, not one copy of each log per name."""
+    mod = summary_tables
+    rows = [
+        {**BASE_ROW, "DATE": "2025-11-01", "DK_POINTS": 40.0},
+        {**BASE_ROW, "DATE": "2025-11-02", "DK_POINTS": 50.0},
+    ]
+    _seed(mod.DB_PATH, rows, [], [("Boston Celtics", "BOS")])
+    conn = sqlite3.connect(mod.DB_PATH)
+    conn.execute("DROP TABLE dim_players")
+    conn.execute("CREATE TABLE dim_players (PLAYER_ID INT, PLAYER_NAME TEXT)")
+    conn.executemany(
+        "INSERT INTO dim_players VALUES (?,?)", [(1, "Alpha Player"), (1, "Alpha Player")]
+    )
+    conn.commit()
+    conn.close()
+
+    assert mod.create_fantasy_averages_table() is True
+
+    df = pd.read_sql_query("SELECT GP, DK_POINTS_sum FROM fantasy_averages", mod.engine)
+    assert df["GP"].tolist() == [2]
+    assert df["DK_POINTS_sum"].tolist() == [90.0]
+
+
 def test_season_type_classification(summary_tables):
     mod = summary_tables
     rows = [
@@ -159,3 +185,61 @@ def test_run_summary_pipeline_creates_views(summary_tables):
     ).iloc[0]["count"]
     assert regular_count == 1
     assert playoff_count == 0
+
+
+def test_export_views_to_csv_writes_view_rows(summary_tables):
+    mod = summary_tables
+    rows = [
+        {**BASE_ROW, "DATE": "2025-11-01", "DK_POINTS": 40.0, "MINUTES": 34.0},
+        {**BASE_ROW, "DATE": "2025-11-02", "DK_POINTS": 50.0, "MINUTES": 36.0},
+    ]
+    _seed(mod.DB_PATH, rows, [(1, "Canonical Name")], [("Boston Celtics", "BOS")])
+
+    mod.run_summary_pipeline()
+
+    export_dir = Path(mod.CSV_EXPORT_DIR)
+    regular_files = list(export_dir.glob("player_averages_regular_season_*.csv"))
+    playoff_files = list(export_dir.glob("player_averages_playoffs_*.csv"))
+    assert len(regular_files) == 1
+    assert len(playoff_files) == 1
+
+    # The CSV must carry the view's full column set (header row) and its rows.
+    regular = pd.read_csv(regular_files[0])
+    view = pd.read_sql_query(
+        "SELECT * FROM vw_player_averages_regular_season", mod.engine
+    )
+    assert list(regular.columns) == list(view.columns)
+    assert len(regular) == 1
+    assert regular.iloc[0]["PLAYER"] == "Canonical Name"
+    assert regular.iloc[0]["GP"] == 2
+    assert abs(regular.iloc[0]["FPPG"] - 45.0) < 0.01
+
+    # An empty view still gets a header-only file.
+    playoffs = pd.read_csv(playoff_files[0])
+    assert list(playoffs.columns) == list(view.columns)
+    assert playoffs.empty
+
+
+def test_export_views_to_csv_skips_unknown_season_type(summary_tables, capsys):
+    """A fantasy_averages row whose SEASON_TYPE no view selects is left out of
+    every file and reported, without stopping the export."""
+    mod = summary_tables
+    conn = sqlite3.connect(mod.DB_PATH)
+    conn.execute("CREATE TABLE fantasy_averages (SEASON_TYPE TEXT, PLAYER TEXT)")
+    conn.executemany(
+        "INSERT INTO fantasy_averages VALUES (?,?)",
+        [("Play-In", "Alpha Player"), ("Regular", "Beta Player"), (None, "Gamma Player")],
+    )
+    conn.commit()
+    conn.close()
+
+    mod.export_views_to_csv(list(mod.SEASON_TYPE_VIEWS) + ["vw_unknown"])
+
+    export_dir = Path(mod.CSV_EXPORT_DIR)
+    (regular_file,) = export_dir.glob("player_averages_regular_season_*.csv")
+    (playoff_file,) = export_dir.glob("player_averages_playoffs_*.csv")
+    assert pd.read_csv(regular_file)["PLAYER"].tolist() == ["Beta Player"]
+    assert pd.read_csv(playoff_file).empty
+    out = capsys.readouterr().out
+    assert "skipped 2 fantasy_averages rows" in out
+    assert "error" not in out.lower()
@@ -193,3 +193,40 @@ def test_missing_player_id_row_dropped_counted_and_surfaced(fantasy_upload):
     assert "Fantasy Rows Dropped (missing PLAYER_ID/GAME_ID): 1" in captured["body"]
     assert "(With Warnings)" in captured["subject"]
     assert "SUCCESS" in captured["subject"]
+
+
+def test_files_archived_only_up_to_failed_file(fantasy_upload):
+    """Files are archived after the run's single load transaction commits: the
+    good file before a failure is loaded and moved, the failed file stays put."""
+    mod = fantasy_upload
+    good = make_fantasy_rows([(1, "Alpha Player", "2025-11-01")])
+    bad = make_fantasy_rows([(2.5, "Corrupt Player", "2025-11-02")])
+    write_fantasy_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed_01_good.xlsx"), good)
+    write_fantasy_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed_02_bad.xlsx"), bad)
+
+    mod.main()
+
+    assert count_rows(mod.engine, "dim_players") == 1
+    assert os.path.exists(os.path.join(mod.PROCESSED_FOLDER, "feed_01_good.xlsx"))
+    assert not os.path.exists(os.path.join(mod.NEW_FILES_FOLDER, "feed_01_good.xlsx"))
+    assert os.path.exists(os.path.join(mod.NEW_FILES_FOLDER, "feed_02_bad.xlsx"))
+
+
+def test_dedup_matches_unmigrated_real_player_id(fantasy_upload):
+    """Existing rows stored with a REAL PLAYER_ID (pre-014 DB) and a timestamp-
+    formatted DATE must still be seen as duplicates of the incoming keys."""
+    from sqlalchemy import text
+    mod = fantasy_upload
+    with mod.engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE fantasy_logs (PLAYER_ID REAL, PLAYER TEXT, DATE TEXT)"
+        ))
+        conn.execute(text(
+            "INSERT INTO fantasy_logs VALUES (1.0, 'Alpha Player', '2025-11-01 00:00:00')"
+        ))
+    rows = make_fantasy_rows([(1, "Alpha Player", "2025-11-01")])
+    write_fantasy_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed1.xlsx"), rows)
+
+    mod.main()
+
+    assert count_rows(mod.engine, "fantasy_logs") == 1
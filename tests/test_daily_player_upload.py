@@ -87,7 +87,7 @@ def test_unique_index_prevents_silent_duplicate(player_upload):
     write_player_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed2.xlsx"), rows)
     mod.main()
 
-    # Only one row — the in-memory dedup prevents the duplicate.
+    # Only one row — the NOT EXISTS anti-join skips the duplicate.
     assert count_rows(mod.engine, "player_logs") == 1
 
     inspector = inspect(mod.engine)
@@ -118,3 +118,154 @@ def test_unique_index_raises_on_duplicate_insert(player_upload):
 
     # The rejected insert must not have added rows.
     assert count_rows(mod.engine, "player_logs") == 1
+
+
+def test_parse_failure_stops_run_after_earlier_files_load(player_upload):
+    """Files are parsed in parallel but loaded in order: a workbook that fails to
+    parse must leave every earlier file loaded and archived, and itself unmoved."""
+    mod = player_upload
+    rows = make_rows([(1, "Alpha Player", "2025-11-01", 30)])
+    write_player_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed_01.xlsx"), rows)
+    bad_path = os.path.join(mod.NEW_FILES_FOLDER, "feed_02.xlsx")
+    with open(bad_path, "wb") as f:
+        f.write(b"not a workbook")
+
+    processed, _, _ = mod.main()
+
+    assert processed == 1
+    assert count_rows(mod.engine, "player_logs") == 1
+    assert os.path.exists(os.path.join(mod.PROCESSED_FOLDER, "feed_01.xlsx"))
+    assert os.path.exists(bad_path)
+
+
+def test_dedup_matches_timestamp_formatted_date(player_upload):
+    """An existing row stored with a timestamp-formatted DATE must still be seen as
+    a duplicate of the incoming 'YYYY-MM-DD' key (as the baseline's pd.to_datetime
+    normalization guaranteed), not re-inserted."""
+    from sqlalchemy import text
+    mod = player_upload
+    with mod.engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE player_logs (PLAYER_ID BIGINT, PLAYER TEXT, DATE TEXT, PTS BIGINT)"
+        ))
+        conn.execute(text(
+            "INSERT INTO player_logs VALUES (1, 'Alpha Player', '2025-11-01 00:00:00', 30)"
+        ))
+    rows = make_rows([
+        (1, "Alpha Player", "2025-11-01", 30),
+        (1, "Alpha Player", "2025-11-02", 25),
+    ])
+    write_player_xlsx(os.path.join(mod.NEW_FILES_FOLDER, "feed1.xlsx"), rows)
+
+    mod.main()
+
+    dates = pd.read_sql_query(
+        "SELECT DATE FROM player_logs ORDER BY DATE", mod.engine
+    )["DATE"].tolist()
+    assert dates == ["2025-11-01 00:00:00", "2025-11-02"]
+
+
+def test_spawned_workers_parse_and_load_several_files(player_upload, monkeypatch):
+    """Several files go through the process pool. Run it with the spawn start method
+    the Windows deployment uses, so every worker re-imports what it runs; all files
+    must still load, in order, and be archived."""
+    import functools
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    mod = player_upload
+    monkeypatch.setattr(
+        mod,
+        "ProcessPoolExecutor",
+        functools.partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")
+        ),
+    )
+    write_player_xlsx(
+        os.path.join(mod.NEW_FILES_FOLDER, "feed_01.xlsx"),
+        make_rows([(1, "Alpha Player", "2025-11-01", 30)]),
+    )
+    write_player_xlsx(
+        os.path.join(mod.NEW_FILES_FOLDER, "feed_02.xlsx"),
+        make_rows([
+            (1, "Alpha Player", "2025-11-01", 30),
+            (2, "Beta Player", "2025-11-02", 20),
+        ]),
+    )
+    write_player_xlsx(
+        os.path.join(mod.NEW_FILES_FOLDER, "feed_03.xlsx"),
+        make_rows([(1, "Alpha Player", "2025-11-03", 25)]),
+    )
+
+    processed, _, _ = mod.main()
+
+    assert processed == 3
+    assert count_rows(mod.engine, "player_logs") == 3
+    assert count_rows(mod.engine, "dim_players") == 2
+    assert sorted(os.listdir(mod.PROCESSED_FOLDER)) == [
+        "feed_01.xlsx", "feed_02.xlsx", "feed_03.xlsx"
+    ]
+
+
+def test_parse_in_order_bounds_parses_in_flight(player_upload, monkeypatch):
+    """Parses are submitted at most `window` ahead of the file being loaded, so a
+    long backlog does not hold every parsed DataFrame in memory at once."""
+    from concurrent.futures import Future
+
+    mod = player_upload
+    submitted = []
+
+    class InlineExecutor:
+        def submit(self, fn, file_path):
+            submitted.append(file_path)
+            future = Future()
+            future.set_result(file_path)
+            return future
+
+    monkeypatch.setattr(mod.player_feed, "parse_player_log", lambda file_path: file_path)
+    files = [f"feed_{n:02d}.xlsx" for n in range(1, 7)]
+
+    parsed = mod.parse_in_order(InlineExecutor(), files, window=2)
+
+    assert next(parsed) == "feed_01.xlsx"
+    assert submitted == files[:3]
+    assert list(parsed) == files[1:]
+    assert submitted == files
+
+
+def test_player_feed_import_has_no_pipeline_side_effects(tmp_path):
+    """Parsing needs only player_feed; importing it must not pull in the upload
+    module (engine, makedirs) or the database stack."""
+    import subprocess
+    import sys
+
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, bigdataball.player_feed; "
+            "print(sorted(m for m in ('bigdataball.daily_player_upload', 'sqlalchemy') "
+            "if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": src_dir},
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_sanitize_column_handles_non_string_headers_and_separator_sets():
+    """Numeric and blank Excel headers are sanitized as their str(); the fantasy
+    feed's separator set turns only newlines/spaces into underscores."""
+    import re
+
+    from bigdataball import player_feed
+
+    assert player_feed.sanitize_column(2025) == "2025"
+    assert player_feed.sanitize_column(None) == "NONE"
+    assert player_feed.sanitize_column("OWN\nTEAM") == "OWN_TEAM"
+    assert player_feed.sanitize_column("GAME-ID") == "GAME_ID"
+    assert player_feed.sanitize_column("GAME-ID", re.compile(r"[\n ]")) == "GAMEID"
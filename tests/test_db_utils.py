@@ -0,0 +1,115 @@
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from bigdataball import db_utils
+
+
+def test_tune_engine_applies_pragmas_to_new_connections(tmp_path):
+    engine = db_utils.tune_engine(create_engine(f"sqlite:///{tmp_path / 't.db'}"))
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 60000
+            # The journal mode must stay rollback-journal so read-only consumers
+            # can still ATTACH the database.
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    finally:
+        engine.dispose()
+
+
+def test_later_pragmas_override_the_defaults(tmp_path):
+    engine = db_utils.tune_engine(
+        create_engine(f"sqlite:///{tmp_path / 't.db'}"),
+        pragmas=db_utils.CONNECTION_PRAGMAS + ("PRAGMA cache_size=-131072",),
+    )
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -131072
+    finally:
+        engine.dispose()
+
+
+def test_apply_pragmas_on_raw_sqlite3_connection(tmp_path):
+    conn = sqlite3.connect(tmp_path / "t.db")
+    try:
+        db_utils.apply_pragmas(conn)
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 60000
+    finally:
+        conn.close()
+
+
+def test_create_players_table_is_idempotent_and_keyed(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 't.db'}")
+    try:
+        with engine.begin() as conn:
+            db_utils.create_players_table(conn)
+            conn.execute(text("INSERT INTO dim_players VALUES (1, 'Alpha Player')"))
+            db_utils.create_players_table(conn)  # existing table and rows untouched
+            columns = conn.execute(text("PRAGMA table_info(dim_players)")).fetchall()
+            assert conn.execute(text("SELECT COUNT(*) FROM dim_players")).scalar() == 1
+        # (cid, name, type, notnull, dflt_value, pk)
+        assert [(c[1], c[2], c[5]) for c in columns] == [
+            ("PLAYER_ID", "INTEGER", 1),
+            ("PLAYER_NAME", "TEXT", 0),
+        ]
+    finally:
+        engine.dispose()
+
+
+def test_learn_players_skips_known_ids_in_a_table_without_primary_key(tmp_path):
+    """A dim_players created by an older to_sql append has no PRIMARY KEY; learning
+    must still add only unseen ids, each under the name on its first source row."""
+    engine = create_engine(f"sqlite:///{tmp_path / 't.db'}")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE dim_players (PLAYER_ID BIGINT, PLAYER_NAME TEXT)"))
+            conn.execute(text("INSERT INTO dim_players VALUES (1, 'Alpha Player')"))
+            conn.execute(text("CREATE TABLE source (PLAYER_ID BIGINT, PLAYER TEXT)"))
+            conn.execute(text(
+                "INSERT INTO source VALUES (1, 'Alpha Player'), (2, 'Beta Player'), "
+                "(2, 'Beta Renamed'), (3, 'Gamma Player')"
+            ))
+            assert db_utils.learn_players(conn, "source") == 2
+            assert db_utils.learn_players(conn, "source") == 0
+            rows = conn.execute(
+                text("SELECT PLAYER_ID, PLAYER_NAME FROM dim_players ORDER BY PLAYER_ID")
+            ).fetchall()
+        assert rows == [(1, "Alpha Player"), (2, "Beta Player"), (3, "Gamma Player")]
+    finally:
+        engine.dispose()
+
+
+def test_insert_new_logs_skips_existing_and_repeated_keys(tmp_path):
+    """Only unseen (PLAYER_ID, DATE) keys are inserted -- a legacy timestamp-formatted
+    DATE counts as present, and a key repeated in the batch is inserted once -- and
+    the scratch table is dropped afterwards."""
+    import pandas as pd
+
+    engine = create_engine(f"sqlite:///{tmp_path / 't.db'}")
+    try:
+        with engine.begin() as conn:
+            db_utils.create_players_table(conn)
+            conn.execute(text("CREATE TABLE logs (PLAYER_ID BIGINT, PLAYER TEXT, DATE TEXT)"))
+            conn.execute(text("INSERT INTO logs VALUES (1, 'Alpha Player', '2025-11-01 00:00:00')"))
+            staged = pd.DataFrame(
+                [
+                    (1, "Alpha Player", "2025-11-01"),
+                    (1, "Alpha Player", "2025-11-02"),
+                    (1, "Alpha Player", "2025-11-02"),
+                    (2, "Beta Player", "2025-11-02"),
+                ],
+                columns=["PLAYER_ID", "PLAYER", "DATE"],
+            )
+            assert db_utils.insert_new_logs(conn, "logs", "_stage_logs", staged) == (2, 2)
+            dates = conn.execute(
+                text("SELECT PLAYER_ID, DATE FROM logs ORDER BY PLAYER_ID, DATE")
+            ).fetchall()
+            stage = conn.execute(
+                text("SELECT name FROM sqlite_master WHERE name = '_stage_logs'")
+            ).fetchall()
+        assert dates == [(1, "2025-11-01 00:00:00"), (1, "2025-11-02"), (2, "2025-11-02")]
+        assert stage == []
+    finally:
+        engine.dispose()
@@ -60,3 +60,35 @@ def test_non_string_and_whitespace_in_dk_names():
     assert matched == ["LeBron James"]
     assert len(unmatched) == 1
     assert "123" in unmatched[0]
+
+
+def test_best_match_and_rounded_score_reported_for_miss():
+    # Unmatched entries report the single best DB name and an integer WRatio score,
+    # in the same "(Best match: ..., Score: N)" shape the email/worklist expect.
+    matched, unmatched = dk_matching.match_names(
+        ["Jose Alvarado"], ["José Alvarado", "LeBron James"], threshold=101
+    )
+    assert matched == []
+    assert unmatched == ["Jose Alvarado (Best match: José Alvarado, Score: 96)"]
+
+
+def test_dk_parse_reused_until_file_changes(tmp_path):
+    dk_file = tmp_path / "DKEntries.csv"
+    dk_file.write_text("Position,Name + ID,Name\nPG,LeBron James (1),LeBron James\n", encoding="utf-8")
+    assert dk_matching.load_dk_names(str(dk_file)) == ["LeBron James"]
+
+    # A rewrite (new size/mtime) must be re-parsed rather than served from the cache.
+    dk_file.write_text(
+        "Position,Name + ID,Name\nPG,LeBron James (1),LeBron James\nPG,Stephen Curry (2),Stephen Curry\n",
+        encoding="utf-8",
+    )
+    assert dk_matching.load_dk_names(str(dk_file)) == ["LeBron James", "Stephen Curry"]
+
+
+def test_header_row_detected_below_preamble(tmp_path):
+    dk_file = tmp_path / "DKEntries.csv"
+    dk_file.write_text(
+        "Entry ID,Contest Name\n1,Slate\nPosition,Name + ID,Name\nSF,LeBron James (1),LeBron James\n",
+        encoding="utf-8",
+    )
+    assert dk_matching.load_dk_names(str(dk_file)) == ["LeBron James"]
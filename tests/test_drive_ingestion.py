@@ -0,0 +1,83 @@
+import importlib
+import sys
+
+import pytest
+
+google_credentials = pytest.importorskip("google.oauth2.credentials")
+
+
+@pytest.fixture
+def drive_ingestion():
+    """Imports the real drive_ingestion, then removes it again so the fantasy_upload
+    fixture's stub is what the orchestrator imports in later tests."""
+    import bigdataball
+
+    module = importlib.import_module("bigdataball.drive_ingestion")
+    yield module
+    sys.modules.pop("bigdataball.drive_ingestion", None)
+    vars(bigdataball).pop("drive_ingestion", None)
+
+
+def _make_creds():
+    return google_credentials.Credentials(
+        token="access-token",
+        refresh_token="refresh-token",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="client-id",
+        client_secret="client-secret",
+    )
+
+
+def _jobs(*names):
+    return [
+        {"name": name, "drive_folder_id": f"{name}-folder", "file_match": name, "local_dest": "."}
+        for name in names
+    ]
+
+
+def test_no_jobs_returns_without_authenticating(drive_ingestion, monkeypatch):
+    """An empty DATASET_JOBS must not reach ThreadPoolExecutor(max_workers=0)."""
+    monkeypatch.setattr(drive_ingestion.config, "DATASET_JOBS", [])
+
+    def fail_auth():
+        raise AssertionError("authenticated with no jobs to run")
+
+    monkeypatch.setattr(drive_ingestion, "authenticate_google_drive", fail_auth)
+
+    drive_ingestion.main()
+
+
+def test_each_job_gets_its_own_credentials(drive_ingestion, monkeypatch):
+    """Job threads must not share (and concurrently refresh) one Credentials object."""
+    shared = _make_creds()
+    seen = []
+    monkeypatch.setattr(drive_ingestion.config, "DATASET_JOBS", _jobs("dfs", "player"))
+    monkeypatch.setattr(drive_ingestion, "authenticate_google_drive", lambda: shared)
+    monkeypatch.setattr(
+        drive_ingestion, "get_drive_service", lambda creds: seen.append(creds) or object()
+    )
+    monkeypatch.setattr(drive_ingestion, "find_latest_file", lambda *args: None)
+
+    drive_ingestion.main()
+
+    assert len(seen) == 2
+    assert all(creds is not shared for creds in seen)
+    assert seen[0] is not seen[1]
+    assert {creds.token for creds in seen} == {"access-token"}
+
+
+def test_job_failure_propagates(drive_ingestion, monkeypatch):
+    """A failing job re-raises in main() so the pipeline sees the error."""
+    monkeypatch.setattr(drive_ingestion.config, "DATASET_JOBS", _jobs("dfs", "player"))
+    monkeypatch.setattr(drive_ingestion, "authenticate_google_drive", _make_creds)
+    monkeypatch.setattr(drive_ingestion, "get_drive_service", lambda creds: object())
+
+    def find_latest_file(service, folder_id, file_match):
+        if file_match == "player":
+            raise RuntimeError("Drive query failed")
+        return None
+
+    monkeypatch.setattr(drive_ingestion, "find_latest_file", find_latest_file)
+
+    with pytest.raises(RuntimeError, match="Drive query failed"):
+        drive_ingestion.main()
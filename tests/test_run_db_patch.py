@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from bigdataball import run_db_patch
+
+
+@pytest.fixture
+def patch_db(tmp_path, monkeypatch):
+    """A database with dim_players and player_logs (no fantasy tables) at run_db_patch.DB_PATH."""
+    db_path = tmp_path / "nba_fantasy_logs.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE dim_players (PLAYER_ID INTEGER, PLAYER_NAME TEXT)")
+    conn.execute("CREATE TABLE player_logs (PLAYER_ID INTEGER, PLAYER TEXT, DATE TEXT)")
+    conn.executemany(
+        "INSERT INTO dim_players VALUES (?, ?)",
+        [(1, "GG Jackson"), (2, "A.J. Green"), (3, "Alpha Player")],
+    )
+    conn.executemany(
+        "INSERT INTO player_logs VALUES (?, ?, ?)",
+        [
+            (1, "GG Jackson II", "2025-11-01"),
+            (1, "GG Jackson", "2025-11-02"),
+            (2, "A.J. Green", "2025-11-01"),
+            (3, "Alpha Player", "2025-11-01"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(run_db_patch, "DB_PATH", str(db_path))
+    monkeypatch.setattr(
+        run_db_patch.mappings,
+        "PLAYER_NAME_MAP",
+        {"GG Jackson": "Gregory Jackson", "GG Jackson II": "Gregory Jackson", "A.J. Green": "AJ Green"},
+    )
+    return db_path
+
+
+def _names(db_path, table, column):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(f"SELECT {column} FROM {table} ORDER BY rowid")]
+    finally:
+        conn.close()
+
+
+def test_renames_variants_in_every_existing_table(patch_db):
+    """Every variant is renamed in one pass; unmapped names and missing tables are left alone."""
+    run_db_patch.fix_player_names()
+
+    assert _names(patch_db, "dim_players", "PLAYER_NAME") == [
+        "Gregory Jackson", "AJ Green", "Alpha Player"
+    ]
+    assert _names(patch_db, "player_logs", "PLAYER") == [
+        "Gregory Jackson", "Gregory Jackson", "AJ Green", "Alpha Player"
+    ]
+
+
+def test_empty_map_is_a_no_op(patch_db, monkeypatch):
+    """An empty map must return before building an invalid `IN ()` statement."""
+    monkeypatch.setattr(run_db_patch.mappings, "PLAYER_NAME_MAP", {})
+
+    run_db_patch.fix_player_names()
+
+    assert _names(patch_db, "dim_players", "PLAYER_NAME") == [
+        "GG Jackson", "A.J. Green", "Alpha Player"
+    ]
+
+
+def test_chained_map_is_rejected(patch_db, monkeypatch):
+    """A target that is also a variant would need two passes; refuse it without writing."""
+    monkeypatch.setattr(
+        run_db_patch.mappings,
+        "PLAYER_NAME_MAP",
+        {"GG Jackson": "Gregory Jackson", "Gregory Jackson": "Greg Jackson"},
+    )
+
+    with pytest.raises(ValueError, match="chained"):
+        run_db_patch.fix_player_names()
+
+    assert _names(patch_db, "dim_players", "PLAYER_NAME")[0] == "GG Jackson"